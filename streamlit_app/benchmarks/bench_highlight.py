@@ -0,0 +1,56 @@
+"""Benchmark for the cell diff / highlight engine.
+
+Run from the streamlit_app directory:
+    python -m benchmarks.bench_highlight
+"""
+import time
+import numpy as np
+import pandas as pd
+from section.utils.helper import compute_cell_diff, highlight_critical_and_edited
+
+ROW_SIZES = [10_000, 50_000, 200_000, 500_000]
+N_COLUMNS = 12
+EDIT_RATIO = 0.01
+
+
+def make_frames(n_rows, n_cols=N_COLUMNS, seed=0):
+    """Build an original frame and a copy with a fraction of cells edited."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_cols):
+        if i % 3 == 0:
+            data[f"account_{i}"] = rng.integers(0, 1_000_000, n_rows)
+        elif i % 3 == 1:
+            data[f"amount_{i}"] = rng.normal(1000, 250, n_rows).round(2)
+        else:
+            data[f"status_{i}"] = rng.choice(["posted", "pending", None], n_rows)
+    original = pd.DataFrame(data)
+
+    edited = original.copy()
+    n_edits = max(1, int(n_rows * EDIT_RATIO))
+    rows = rng.integers(0, n_rows, n_edits)
+    edited.iloc[rows, 1] = -1.0
+    edited.iloc[rows, 2] = "edited"
+    return edited, original
+
+
+def run():
+    print(f"{'rows':>10} {'cells':>12} {'diff s':>10} {'styles s':>10} {'ns/cell':>9}")
+    for n_rows in ROW_SIZES:
+        edited, original = make_frames(n_rows)
+        critical = [c for c in edited.columns if c.startswith(("account", "amount"))]
+
+        start = time.perf_counter()
+        diff = compute_cell_diff(edited, original, critical)
+        diff_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        highlight_critical_and_edited(edited, original, critical, diff=diff)
+        style_s = time.perf_counter() - start
+
+        cells = edited.size
+        print(f"{n_rows:>10} {cells:>12} {diff_s:>10.3f} {style_s:>10.3f} {diff_s / cells * 1e9:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,41 @@
+"""Benchmark for cold start: time until the login page has rendered.
+
+Each run is a fresh interpreter, so module import cost is included. Run from the streamlit_app directory:
+    python -m benchmarks.bench_startup
+"""
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+# Runs the app headless; reports harness import time, time to first render and which app modules got loaded
+# (streamlit itself imports plotly core, so only plotly.express is reported)
+PROBE = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+app = AppTest.from_file("streamlit_app.py", default_timeout=60).run()
+done = time.perf_counter()
+assert not app.exception, app.exception
+assert app.title and "Login" in app.title[0].value
+loaded = sorted(m for m in __import__("sys").modules if m == "plotly.express" or m.startswith("section."))
+print(ready - start, done - ready, ",".join(loaded))
+"""
+
+
+def run():
+    print(f"{'run':>4} {'harness s':>10} {'first render s':>15}")
+    renders = []
+    for i in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        harness_s, render_s, loaded = out.stdout.split()
+        renders.append(float(render_s))
+        print(f"{i:>4} {float(harness_s):>10.3f} {float(render_s):>15.3f}")
+    print(f"median first render: {statistics.median(renders):.3f} s")
+    print(f"modules loaded at login: {loaded.replace(',', ', ')}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,157 @@
+"""Benchmark suite for the upload, optimize, highlight, save and search paths on synthetic banking data.
+
+Runs against a temporary SQLite file standing in for the MySQL database. Each result is appended to a JSON
+lines file together with the current commit, so runs from different commits can be compared.
+
+Run from the streamlit_app directory:
+    python -m benchmarks.bench_suite                          # all sizes, 10k to 5M rows
+    python -m benchmarks.bench_suite --sizes 10000,100000 --columns 20 --null-ratio 0.05
+    python -m benchmarks.bench_suite --compare                # seconds per case for the last commits run
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from benchmarks.datasets import make_banking_frame, to_csv_bytes
+from section.utils import helper, ingest, upload_cache
+from section.utils.ingest import InMemoryUpload
+from section.utils.optimize import optimize_dtypes
+
+ROW_SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+N_COLUMNS = 12
+NULL_RATIO = 0.02
+EDIT_RATIO = 0.01
+# Small sizes are repeated and the best time kept; large ones run once
+REPEAT_BELOW_ROWS = 200_000
+REPEATS = 3
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results.jsonl")
+COMPARE_COMMITS = 4
+
+
+def _commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return f"{sha}+dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _best_of(fn, repeats, setup=None):
+    best = float("inf")
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _edited_copy(df, seed=1):
+    """df with EDIT_RATIO of the rows changed in the amount column."""
+    rng = np.random.default_rng(seed)
+    edited = df.copy()
+    rows = rng.choice(len(df), max(1, int(len(df) * EDIT_RATIO)), replace=False)
+    edited.iloc[rows, edited.columns.get_loc("amount")] = -1.0
+    return edited
+
+
+def run_size(n_rows, n_columns, null_ratio, engine):
+    """Time every case at one size; yields (case, seconds)."""
+    repeats = REPEATS if n_rows < REPEAT_BELOW_ROWS else 1
+    df = make_banking_frame(n_rows, n_columns, null_ratio)
+    csv_bytes = to_csv_bytes(df)
+
+    yield "load_file csv", _best_of(
+        lambda: ingest.load_file(InMemoryUpload(csv_bytes, "bench.csv"), memory_budget_mb=64 * 1024), repeats)
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        def load_upload():
+            upload_cache.load_upload(InMemoryUpload(csv_bytes, "bench.csv"), memory_budget_mb=64 * 1024, cache_dir=cache_dir)
+        load_upload()
+        yield "load_upload cache hit", _best_of(load_upload, repeats)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    yield "optimize_dtypes", _best_of(lambda: optimize_dtypes(df), repeats)
+
+    def clear_keyword_caches():
+        helper._keyword_matcher.cache_clear()
+        helper._critical_for_columns.cache_clear()
+
+    yield "identify_critical_columns", _best_of(
+        lambda: helper.identify_critical_columns(df.columns, helper.CRITICAL_KEYWORDS), repeats, clear_keyword_caches)
+    yield "identify_sensitive_columns", _best_of(
+        lambda: helper.identify_sensitive_columns(df, helper.CRITICAL_KEYWORDS), repeats, clear_keyword_caches)
+
+    edited = _edited_copy(df)
+    critical = helper.identify_critical_columns(df.columns, helper.CRITICAL_KEYWORDS)
+    yield "highlight_critical_and_edited", _best_of(
+        lambda: helper.highlight_critical_and_edited(edited, df, critical), repeats)
+
+    table = "bench_suite"
+    helper.forget_persisted_table(table)
+    yield "save_dataframe_to_db full", _best_of(
+        lambda: helper.save_dataframe_to_db(df, table), 1, lambda: helper.forget_persisted_table(table))
+    yield "save_dataframe_to_db incremental", _best_of(lambda: helper.save_dataframe_to_db(edited, table), 1)
+
+    query = f"SELECT * FROM {table} WHERE amount > 100"
+    yield "search_database_stream capped", _best_of(
+        lambda: helper.search_database_stream(query, use_cache=False), repeats)
+    yield "search_database full", _best_of(lambda: helper.search_database(query), repeats)
+
+
+def run(sizes, n_columns, null_ratio, output):
+    path = tempfile.mktemp(suffix=".db")
+    engine = create_engine(f"sqlite:///{path}")
+    helper.set_engine("database1", engine)
+    commit = _commit()
+    started = datetime.datetime.now().isoformat(timespec="seconds")
+    print(f"commit {commit}, {n_columns} columns, null ratio {null_ratio}, results -> {output}")
+    print(f"{'rows':>9} {'case':<34} {'seconds':>9} {'rows/s':>13}")
+
+    try:
+        with open(output, "a") as results:
+            for n_rows in sizes:
+                for case, seconds in run_size(n_rows, n_columns, null_ratio, engine):
+                    print(f"{n_rows:>9} {case:<34} {seconds:>9.4f} {n_rows / seconds:>13,.0f}")
+                    results.write(json.dumps({
+                        "commit": commit, "started": started, "case": case, "rows": n_rows,
+                        "columns": n_columns, "null_ratio": null_ratio, "seconds": round(seconds, 6),
+                    }) + "\n")
+                    results.flush()
+    finally:
+        engine.dispose()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def compare(output, commits=COMPARE_COMMITS):
+    """Print seconds per (case, rows) for the most recent commits in the results file."""
+    results = pd.read_json(output, lines=True)
+    latest = results.drop_duplicates("commit", keep="last").sort_values("started")["commit"].tail(commits)
+    results = results[results["commit"].isin(latest)]
+    table = results.pivot_table(index=["case", "rows"], columns="commit", values="seconds", aggfunc="last")
+    print(table[list(latest)].to_string(float_format=lambda v: f"{v:.4f}"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, ROW_SIZES)), help="comma-separated row counts")
+    parser.add_argument("--columns", type=int, default=N_COLUMNS)
+    parser.add_argument("--null-ratio", type=float, default=NULL_RATIO)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--compare", action="store_true", help="compare earlier runs instead of running")
+    args = parser.parse_args()
+    if args.compare:
+        compare(args.output)
+    else:
+        run([int(size) for size in args.sizes.split(",")], args.columns, args.null_ratio, args.output)
@@ -0,0 +1,119 @@
+"""Deterministic synthetic banking datasets for benchmarks.
+
+Column names come from CRITICAL_KEYWORDS, so the critical-column logic sees the same names it would see in
+real uploads. The same (rows, columns, null_ratio, seed) always produces the same frame, and each column is
+drawn from its own random stream, so widening a dataset does not change the columns it already had.
+
+    from benchmarks.datasets import make_banking_frame
+    df = make_banking_frame(100_000, n_columns=16, null_ratio=0.02)
+"""
+import io
+import numpy as np
+import pandas as pd
+from section.utils.helper import CRITICAL_KEYWORDS
+
+CURRENCIES = np.array(["USD", "EUR", "GBP", "INR", "JPY", "CHF"])
+COUNTRIES = np.array(["US", "DE", "GB", "IN", "JP", "CH", "FR", "NL"])
+FIRST_NAMES = np.array(["Ana", "Ben", "Chen", "Dara", "Eli", "Femi", "Gita", "Hugo", "Ines", "Jon"])
+LAST_NAMES = np.array(["Ito", "Khan", "Lopez", "Meyer", "Novak", "Okafor", "Park", "Quinn", "Rossi", "Sato"])
+START_DATE = np.datetime64("2020-01-01")
+
+
+def _accounts(rng, n):
+    return rng.integers(10**9, 10**10, n)
+
+
+def _ids_from_pool(rng, n, pool_ratio=0.05):
+    return rng.integers(1, max(2, int(n * pool_ratio)), n)
+
+
+def _card_numbers(rng, n):
+    """16-digit strings with a valid Luhn check digit."""
+    digits = rng.integers(0, 10, (n, 16), dtype=np.int16)
+    digits[:, 0] = 4
+    digits[:, -1] = 0
+    # Double every second digit from the right, starting left of the check digit
+    doubled = digits[:, -2::-2] * 2
+    total = np.where(doubled > 9, doubled - 9, doubled).sum(axis=1) + digits[:, -3::-2].sum(axis=1)
+    digits[:, -1] = (10 - total % 10) % 10
+    return (digits + 48).astype(np.uint8).view("S16").ravel().astype(str)
+
+
+def _names(rng, n):
+    return pd.Series(rng.choice(FIRST_NAMES, n)) + " " + pd.Series(rng.choice(LAST_NAMES, n))
+
+
+def _dates(rng, n):
+    return pd.Series(START_DATE + rng.integers(0, 5 * 365 * 86_400, n).astype("timedelta64[s]"))
+
+
+def _amounts(rng, n):
+    return rng.lognormal(4, 1.2, n).round(2)
+
+
+# Realistic generators for the columns banking files usually have, in the order they are added
+COLUMN_GENERATORS = {
+    "transaction_id": lambda rng, n: np.arange(1, n + 1),
+    "account_number": _accounts,
+    "amount": _amounts,
+    "currency": lambda rng, n: rng.choice(CURRENCIES, n, p=[0.4, 0.25, 0.15, 0.1, 0.05, 0.05]),
+    "date": _dates,
+    "transaction_type": lambda rng, n: rng.choice(["debit", "credit", "transfer"], n),
+    "balance": lambda rng, n: rng.normal(5_000, 3_000, n).round(2),
+    "status": lambda rng, n: rng.choice(["posted", "pending", "failed"], n, p=[0.9, 0.08, 0.02]),
+    "customer_id": _ids_from_pool,
+    "channel": lambda rng, n: rng.choice(["atm", "branch", "online", "mobile"], n),
+    "card_number": _card_numbers,
+    "full_name": _names,
+    "email": lambda rng, n: "user" + pd.Series(_ids_from_pool(rng, n)).astype(str) + "@example.com",
+    "country": lambda rng, n: rng.choice(COUNTRIES, n),
+    "fee": lambda rng, n: rng.choice([0.0, 0.5, 1.0, 2.5], n),
+    "exchange_rate": lambda rng, n: rng.uniform(0.5, 1.5, n).round(4),
+    "fraud": lambda rng, n: rng.random(n) < 0.01,
+    "description": lambda rng, n: rng.choice(["grocery", "salary", "rent", "utilities", "travel", "atm cash"], n),
+}
+
+
+def _filler(name):
+    """Generator for any other keyword column, picked from what the name suggests."""
+    if name.endswith("_id") or name in ("account", "customer", "client"):
+        return _ids_from_pool
+    if name in ("dob", "timestamp"):
+        return _dates
+    if any(word in name for word in ("balance", "limit", "overdraft", "deposit", "withdrawal", "charge", "tax", "penalty")):
+        return _amounts
+    return lambda rng, n: rng.choice([f"{name[:3].upper()}{i}" for i in range(20)], n)
+
+
+def _column_specs(n_columns: int):
+    """(name, keyword) pairs: the realistic set first, then the remaining keywords, suffixed once all are used."""
+    keywords = list(COLUMN_GENERATORS) + [k for k in CRITICAL_KEYWORDS if k not in COLUMN_GENERATORS]
+    specs = []
+    for i in range(n_columns):
+        keyword = keywords[i % len(keywords)]
+        specs.append((keyword if i < len(keywords) else f"{keyword}_{i // len(keywords) + 1}", keyword))
+    return specs
+
+
+def column_names(n_columns: int):
+    return [name for name, _ in _column_specs(n_columns)]
+
+
+def make_banking_frame(n_rows: int, n_columns: int = 12, null_ratio: float = 0.02, seed: int = 0) -> pd.DataFrame:
+    """A banking-like frame; every column except transaction_id has about null_ratio missing values."""
+    data = {}
+    for i, (name, keyword) in enumerate(_column_specs(n_columns)):
+        rng = np.random.default_rng([seed, i])
+        generate = COLUMN_GENERATORS.get(keyword) or _filler(keyword)
+        column = pd.Series(generate(rng, n_rows))
+        if null_ratio and name != "transaction_id":
+            column = column.mask(rng.random(n_rows) < null_ratio)
+        data[name] = column
+    return pd.DataFrame(data)
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
@@ -1,11 +1,251 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import numpy as np
+import uuid
 from streamlit import column_config
-from section.utils.helper import save_dataframe_to_db, search_database, highlight_critical_and_edited, identify_critical_columns, CRITICAL_KEYWORDS, is_safe_sql
-from section.database import database_page
-from section.user import user_page
+from section.utils import batch_ingest, chart_data, editor_window, impute, ingest, render_profile, upload_cache, validation
+from section.utils.snapshots import SnapshotBudgetExceeded, session_store
+from section.utils.journal import session_journal
+from section.utils.optimize import optimize_cached
+from section.utils.profile import numeric_summary, profile_columns
+from section.utils.helper import save_dataframe_to_db, search_database_stream, SEARCH_PAGE_SIZE, SEARCH_ROW_CAP, SEARCH_TIMEOUT_S, highlight_critical_and_edited, identify_sensitive_columns, CRITICAL_KEYWORDS, is_safe_sql, compute_cell_diff
+
+
+def _save_with_progress(df, table_name):
+    """Save to the database while reporting bulk-load progress in the UI."""
+    progress = st.progress(0.0, text="Saving to database...")
+
+    def report(rows_written, total_rows):
+        progress.progress(rows_written / max(total_rows, 1), text=f"Saved {rows_written:,} of {total_rows:,} rows")
+
+    # Rows touched since the last save, from the edit journal; unknown or schema changes fall back to a full diff
+    pending = session_journal().pending_changes()
+    changed_rows = pending.rows if pending is not None and not pending.schema_changed else None
+    try:
+        # Delta saves only trust a snapshot this session wrote for the current upload
+        owner = (st.session_state.session_token, st.session_state.uploaded_file_id)
+        result = save_dataframe_to_db(df, table_name, progress_callback=report, changed_rows=changed_rows, owner=owner)
+    finally:
+        progress.empty()
+    if result[0]:
+        session_journal().mark_saved()
+    return result
+
+
+def _set_uploaded_data(df, changed=True, record=None, rows=None):
+    """Replace the session data and, if changed, mark it so cached passes re-run.
+
+    The frame is stored as a snapshot sharing unchanged columns with earlier versions; a change that would
+    take the session over its memory budget is refused and the rerun stops. With record, the change is
+    added to the edit journal under that label so it can be undone; rows, if known, are the only row labels
+    the change touched, which spares the journal a full comparison.
+    """
+    previous = session_store().get('current')
+    try:
+        st.session_state.uploaded_data = session_store().put('current', df)
+    except SnapshotBudgetExceeded as e:
+        st.error(f"⚠️ {e}")
+        st.stop()
+    if record and previous is not None:
+        session_journal().record(previous, st.session_state.uploaded_data, record, rows)
+    if changed:
+        st.session_state.data_version += 1
+
+
+def _cached_file_info(name, uploaded_file, read):
+    """read(uploaded_file) (e.g. its columns or sheet names), computed once per file rather than on every rerun."""
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] != uploaded_file.file_id:
+        cached = (uploaded_file.file_id, read(uploaded_file))
+        st.session_state[name] = cached
+    return cached[1]
+
+
+def _adopt_upload(data, filename, fingerprint):
+    """Make freshly loaded data the session's data, starting a new edit history.
+
+    fingerprint is the key the data's optimization is already cached under.
+    """
+    session_store().reset(data)
+    session_journal().reset()
+    st.session_state.editor_generation += 1
+    _set_uploaded_data(data)
+    st.session_state.upload_fingerprint = (st.session_state.data_version, fingerprint)
+    st.session_state.uploaded_filename = filename
+    st.session_state.original_data = session_store().put('original', data)
+    st.session_state.original_dtypes = data.dtypes.to_dict()
+
+
+def _show_batch_report(files):
+    report = pd.DataFrame(files, columns=batch_ingest.FileReport._fields)
+    failed = int(report['error'].notna().sum())
+    with st.sidebar.expander(f"📋 Batch report ({len(report) - failed} read, {failed} failed)", expanded=failed > 0):
+        st.dataframe(report.rename(columns={'name': 'File', 'rows': 'Rows', 'seconds': 'Seconds', 'error': 'Error',
+                                            'from_cache': 'Cached'}), hide_index=True, use_container_width=True)
+        st.caption(f"{report['rows'].sum():,} rows, {report['seconds'].sum():,.1f} s of parsing")
+
+
+def _cached_for_version(key, compute):
+    """Return the value stored under key, recomputing it only when data_version has changed."""
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != st.session_state.data_version:
+        cached = (st.session_state.data_version, compute())
+        st.session_state[key] = cached
+    return cached[1]
+
+
+def _show_validation(df, critical_reasons):
+    """Banking field rules for the critical columns, run over whole columns once per data version."""
+    with st.expander("✅ Data Validation"):
+        rules = validation.infer_rules(df, critical_reasons)
+        if not rules:
+            st.info("No validation rules apply to the critical columns of this data.")
+            return
+        labels = {f"{rule.column}: {validation.RULE_DESCRIPTIONS[rule.check]}": rule for rule in rules}
+        chosen = st.multiselect("Rules to check", list(labels), default=list(labels))
+        if not st.toggle("Validate data", key="validation_enabled"):
+            return
+
+        # Reports for this data version, one per rule selection
+        reports = _cached_for_version('validation_reports', dict)
+        selected = tuple(labels[label] for label in chosen)
+        if selected not in reports:
+            reports[selected] = validation.validate(df, list(selected))
+        report = reports[selected]
+
+        failed_rows = report.violations['row'].nunique()
+        st.caption(f"Checked {len(df):,} rows against {len(selected)} rules in {report.seconds:.2f} s: "
+                   f"{len(report.violations):,} violations in {failed_rows:,} rows.")
+        st.dataframe(report.summary.rename(columns={'column': 'Column', 'check': 'Check', 'checked': 'Values checked',
+                                                    'violations': 'Violations'}),
+                     hide_index=True, use_container_width=True)
+        if len(report.violations):
+            shown = report.violations.drop_duplicates('row').head(validation.VIOLATION_PREVIEW_ROWS)['row']
+            st.markdown(f"**First {len(shown):,} rows with violations**")
+            st.dataframe(df.loc[shown], use_container_width=True)
+
+
+def _step_history(step):
+    """Undo or redo one journal entry, save the result and start a fresh editor."""
+    journal = session_journal()
+    label = journal.entries[journal.cursor - 1 if step == 'undo' else journal.cursor].label
+    frame = journal.undo(st.session_state.uploaded_data) if step == 'undo' else journal.redo(st.session_state.uploaded_data)
+    _set_uploaded_data(frame)
+    # The editor re-applies its own pending edits to new data, so it must start over
+    st.session_state.editor_generation += 1
+
+    table_name = st.session_state.uploaded_filename.split('.')[0]
+    save_successful, message = _save_with_progress(frame, table_name)
+    verb = "Undid" if step == 'undo' else "Redid"
+    st.toast(f"{verb} {label}" + ("" if save_successful else f" (not saved: {message})"))
+    st.rerun()
+
+
+def _show_edit_history():
+    journal = session_journal()
+    col1, col2, col3 = st.columns([1, 1, 3])
+    if col1.button("↩️ Undo", disabled=not journal.can_undo(), use_container_width=True):
+        _step_history('undo')
+    if col2.button("↪️ Redo", disabled=not journal.can_redo(), use_container_width=True):
+        _step_history('redo')
+
+    pending = journal.pending_changes()
+    if pending is not None and len(pending.rows) == 0 and not pending.schema_changed:
+        col3.caption(f"{journal.cursor} of {len(journal.entries)} edits applied · database up to date")
+    else:
+        col3.caption(f"{journal.cursor} of {len(journal.entries)} edits applied · database has unsaved changes")
+        if col3.button("💾 Save pending changes"):
+            table_name = st.session_state.uploaded_filename.split('.')[0]
+            save_successful, message = _save_with_progress(st.session_state.uploaded_data, table_name)
+            (st.success if save_successful else st.error)(message)
+
+    if journal.entries:
+        with st.expander("🕘 Edit history"):
+            st.dataframe(pd.DataFrame({
+                "Edit": [delta.label for delta in journal.entries],
+                "Cells": [delta.changed_cells for delta in journal.entries],
+                "Rows": [len(delta.touched_rows) for delta in journal.entries],
+                "Schema change": [delta.schema_changed for delta in journal.entries],
+                "KB": [delta.nbytes / 1024 for delta in journal.entries],
+                "State": ["applied" if i < journal.cursor else "undone" for i in range(len(journal.entries))],
+            }), hide_index=True, use_container_width=True)
+            st.caption(f"Journal holds {journal.nbytes() / 1024**2:,.2f} MB.")
+
+
+def _window_order(df, params):
+    """Row labels for the editor window, recomputed only when the filter, sort or the set of rows changes.
+
+    Edits made through the window keep the order (rows do not jump away while being edited).
+    """
+    cached = st.session_state.get('editor_window_order')
+    if cached is None or cached[0] != params or cached[1] != st.session_state.data_version:
+        cached = (params, st.session_state.data_version, editor_window.ordered_labels(df, *params))
+        st.session_state.editor_window_order = cached
+    return cached[2]
+
+
+def _show_windowed_editor(col_configs):
+    """Edit a large frame one filtered, sorted page at a time; only that page is sent to the browser."""
+    df = st.session_state.uploaded_data
+    columns = list(df.columns)
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    filter_column = col1.selectbox("Filter column", [None] + columns, format_func=lambda c: "(no filter)" if c is None else c)
+    filter_text = col2.text_input("Contains", disabled=filter_column is None)
+    sort_column = col3.selectbox("Sort by", [None] + columns, format_func=lambda c: "(file order)" if c is None else c)
+    ascending = col4.toggle("Ascending", value=True, disabled=sort_column is None)
+    params = (filter_column, filter_text, sort_column, ascending)
+
+    labels = _window_order(df, params)
+    pages = editor_window.page_count(labels)
+    # Keyed by filter and sort, so changing them goes back to the first page
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"editor_page_{hash(params)}")
+    window = df.loc[editor_window.page_labels(labels, page)]
+    st.caption(f"Rows {(page - 1) * editor_window.EDITOR_PAGE_SIZE + 1:,}–{(page - 1) * editor_window.EDITOR_PAGE_SIZE + len(window):,}"
+               f" of {len(labels):,} matching ({len(df):,} in total)")
+
+    edited = st.data_editor(
+        window,
+        use_container_width=True,
+        num_rows="dynamic",
+        # A new window needs a fresh widget, or the editor would apply its pending edits to other rows
+        key=f"editable_window_{st.session_state.editor_generation}_{hash(params)}_{page}",
+        column_config=col_configs,
+    )
+    if edited.equals(window):
+        return edited
+
+    result = editor_window.merge_window(df, window, edited)
+    _set_uploaded_data(result.frame, record="Edit cells", rows=result.touched_rows)
+    if result.rows_changed:
+        st.session_state.editor_generation += 1
+    else:
+        # Keep the window's order through its own edits
+        st.session_state.editor_window_order = (params, st.session_state.data_version, labels)
+
+    table_name = st.session_state.uploaded_filename.split('.')[0]
+    save_successful, message = _save_with_progress(st.session_state.uploaded_data, table_name)
+    if save_successful:
+        st.success("Changes saved to database automatically")
+    else:
+        st.error(f"Error saving changes: {message}")
+    return edited
+
+
+def _show_render_profile():
+    """Per-section breakdown of the reruns profiled in this session."""
+    history = render_profile.history_frame()
+    with st.expander("⏱️ Render profile", expanded=True):
+        if history.empty:
+            st.info("No profiled reruns yet.")
+            return
+        latest = history[history['rerun'] == history['rerun'].max()]
+        st.caption(f"Rerun {latest['rerun'].iloc[0]}: {latest['elapsed_s'].sum() * 1000:.0f} ms across {len(latest)} sections, "
+                   f"{history['rerun'].nunique()} reruns kept")
+        st.dataframe(render_profile.breakdown(history).style.format(precision=1), use_container_width=True)
+        st.caption("Memory is traced for the whole server process, so it includes other sessions profiling at the "
+                   "same time.")
+        st.bar_chart(history.pivot_table(index='rerun', columns='section', values='elapsed_s', aggfunc='sum') * 1000)
 
 
 def show_dashboard():
@@ -22,14 +262,26 @@ def show_dashboard():
         st.session_state.original_data = None
     if 'original_dtypes' not in st.session_state:
         st.session_state.original_dtypes = None
+    if 'uploaded_file_id' not in st.session_state:
+        st.session_state.uploaded_file_id = None
+    if 'session_token' not in st.session_state:
+        st.session_state.session_token = uuid.uuid4().hex
+    if 'batch_report' not in st.session_state:
+        st.session_state.batch_report = None
+    if 'data_version' not in st.session_state:
+        st.session_state.data_version = 0
+    if 'editor_generation' not in st.session_state:
+        st.session_state.editor_generation = 0
 
     page_map = {
     "📶 Dashboard": "Dashboard",
     "🗃️ Database": "Database",
     "👮 User": "User"
     }
+    if st.session_state.get("user_role") == "admin":
+        page_map["🩺 Diagnostics"] = "Diagnostics"
     
-    if "active_page" not in st.session_state:
+    if st.session_state.get("active_page") not in page_map.values():
         st.session_state.active_page = "Dashboard"
     
     selected = st.sidebar.radio(
@@ -41,69 +293,82 @@ def show_dashboard():
     if page_map[selected] != st.session_state.active_page:
         st.session_state.active_page = page_map[selected]
 
-    st.sidebar.title("Upload File")
-    uploaded_file = st.sidebar.file_uploader("Choose a file", type=["csv", "xlsx", "txt", "json"])
+    profiling = st.sidebar.toggle("⏱️ Profile sections", key="render_profile_enabled")
+    render_profile.start_rerun(profiling)
+    render_profile.section("Upload")
 
-    if uploaded_file and uploaded_file != st.session_state.get('uploaded_filename'):
+    st.sidebar.title("Upload File")
+    batch_mode = st.sidebar.toggle("📚 Batch upload", help="Load several files or a zip archive as one dataset")
+    # CSV, TXT and JSON may also be uploaded gzip, bzip2 or zstd compressed
+    file_types = list(ingest.SUPPORTED_EXTENSIONS + ingest.COMPRESSION_EXTENSIONS)
+    load_columns = load_sheets = None
+    if batch_mode:
+        uploaded_files = st.sidebar.file_uploader("Choose files or a zip archive", type=file_types + ["zip"],
+                                                  accept_multiple_files=True)
+        upload_id = tuple(f.file_id for f in uploaded_files) or None
+    else:
+        uploaded_file = st.sidebar.file_uploader("Choose a file", type=file_types)
+        upload_id = uploaded_file.file_id if uploaded_file else None
+        # Parquet and Feather store columns separately, so unneeded ones are never decoded
+        available_columns = (_cached_file_info('columnar_schema', uploaded_file, ingest.columnar_schema)
+                             if uploaded_file else [])
+        if available_columns:
+            chosen = st.sidebar.multiselect("Columns to load", available_columns, default=available_columns,
+                                            key=f"load_columns_{uploaded_file.file_id}")
+            if chosen and len(chosen) < len(available_columns):
+                load_columns = chosen
+                upload_id = (upload_id, tuple(chosen))
+        # Workbooks load their first sheet unless more are chosen; several sheets are combined with a sheet column
+        available_sheets = (_cached_file_info('excel_sheets', uploaded_file, ingest.excel_sheet_names)
+                            if uploaded_file else [])
+        if len(available_sheets) > 1:
+            chosen = st.sidebar.multiselect("Sheets to load", available_sheets, default=available_sheets[:1],
+                                            key=f"load_sheets_{uploaded_file.file_id}")
+            if chosen and chosen != available_sheets[:1]:
+                load_sheets = chosen
+                upload_id = (upload_id, 'sheets', tuple(chosen))
+
+    if upload_id and upload_id != st.session_state.uploaded_file_id:
         st.session_state.upload_error = None
         # Clear previous data if new file is selected
         st.session_state.uploaded_data = None
         st.session_state.uploaded_filename = None
+        st.session_state.uploaded_file_id = upload_id
+        st.session_state.batch_report = None
 
-    if uploaded_file:
-        @st.cache_data(show_spinner="Loading file...")
-        def load_file(uploaded_file):
-            try:
-                if uploaded_file.size == 0:
-                    return None, "Uploaded file is empty (0 bytes)"
+        # Parsed uploads are cached on disk by content, so reopening a file (in any session) skips parsing
+        load_progress = st.sidebar.progress(0.0, text="Reading file...")
 
-                file_ext = uploaded_file.name.split('.')[-1].lower()
+        def report_progress(fraction, message):
+            load_progress.progress(fraction, text=message)
 
-                if file_ext == 'csv':
-                    try:
-                        return pd.read_csv(uploaded_file, low_memory=False), None
-                    except UnicodeDecodeError:
-                        try:
-                            return pd.read_csv(uploaded_file, encoding='latin1', low_memory=False), None
-                        except Exception as e:
-                            return None, f"CSV Error: {str(e)}"
-
-                elif file_ext == 'xlsx':
-                    try:
-                        return pd.read_excel(uploaded_file), None
-                    except Exception as e:
-                        return None, f"Excel Error: {str(e)}"
-
-                elif file_ext == 'txt':
-                    try:
-                        return pd.read_csv(uploaded_file, delimiter='\t', low_memory=False), None
-                    except Exception as e:
-                        return None, f"Text File Error: {str(e)}"
-
-                elif file_ext == 'json':
-                    try:
-                        return pd.read_json(uploaded_file, lines=True), None
-                    except Exception as e:
-                        return None, f"JSON Error: {str(e)}"
-
-                return None, "Unsupported file format"
-
-            except Exception as e:
-                return None, f"Unexpected error: {str(e)}"
-        
-        # Load file and get both data and error
-        data, error = load_file(uploaded_file)
-        
-        if error:
-            st.session_state.upload_error = error
-            st.error(f"⚠️ File Error: {error}")  # Show only in main area
-            st.session_state.uploaded_data = None
-        elif data is not None:
-            st.session_state.uploaded_data = data
-            st.session_state.uploaded_filename = uploaded_file.name
-            st.session_state.original_data = data.copy()
-            st.session_state.original_dtypes = data.dtypes.to_dict()
-            st.sidebar.success(f"Loaded {uploaded_file.name}")
+        if batch_mode:
+            # Files are parsed in parallel worker processes and combined with a source_file column
+            batch = batch_ingest.load_batch(uploaded_files, progress_callback=report_progress)
+            st.session_state.batch_report = batch.files
+            if batch.frame is None:
+                st.session_state.upload_error = "None of the files could be read."
+            else:
+                first_name = uploaded_files[0].name.split('.')[0]
+                _adopt_upload(batch.frame, f"{first_name}_batch.csv", batch.key)
+        else:
+            upload, error = upload_cache.load_upload(uploaded_file, progress_callback=report_progress,
+                                                     columns=load_columns, sheets=load_sheets)
+            if error:
+                st.session_state.upload_error = error
+            elif upload is not None:
+                _adopt_upload(upload.optimization.frame, uploaded_file.name, upload.key)
+        load_progress.empty()
+
+    if batch_mode and st.session_state.batch_report:
+        _show_batch_report(st.session_state.batch_report)
+    if upload_id and st.session_state.upload_error:
+        st.error(f"⚠️ File Error: {st.session_state.upload_error}")  # Show only in main area
+    elif upload_id and st.session_state.uploaded_filename:
+        st.sidebar.success(f"Loaded {st.session_state.uploaded_filename}")
+        usage = session_store().usage()
+        st.sidebar.caption(f"Session data: {usage.resident_mb:,.1f} MB in {usage.versions} versions "
+                           f"({usage.logical_mb:,.1f} MB if each were a separate copy)")
 
     # Main Dashboard
     if st.session_state.active_page == "Dashboard":
@@ -111,38 +376,35 @@ def show_dashboard():
         st.title("📊 Banking Data Dashboard")
 
         if st.session_state.uploaded_data is not None:
-            # Always work with a copy from session state
-            df = st.session_state.uploaded_data.copy()
+            # plotly is only needed once there is data to chart; keep it off the cold-start path
+            import plotly.express as px
+
+            # Data placed in the session some other way is adopted into the snapshot store first
+            if session_store().get('current') is not st.session_state.uploaded_data:
+                _set_uploaded_data(st.session_state.uploaded_data, changed=False)
+            # Work on a snapshot: it shares columns with the session data until something is written
+            df = session_store().checkout('current')
 
+            render_profile.section("Optimization")
             # --- Memory Optimization ---
             st.subheader("Optimizing Data...")
             with st.spinner("Optimizing data types to reduce memory usage..."):
-                original_memory = df.memory_usage(deep=True).sum() / (1024**2)
-                optimized_df = df.copy()
-
-                for col in optimized_df.columns:
-                    if optimized_df[col].dtype == 'object':
-                        if optimized_df[col].nunique() < 0.5 * len(optimized_df[col]):
-                            try:
-                                optimized_df[col] = optimized_df[col].astype('category')
-                            except:
-                                pass
-                    elif optimized_df[col].dtype in ['int64', 'float64']:
-                        try:
-                            optimized_df[col] = pd.to_numeric(optimized_df[col], downcast='integer')
-                        except:
-                            try:
-                                optimized_df[col] = pd.to_numeric(optimized_df[col], downcast='float')
-                            except:
-                                pass
-
-                optimized_memory = optimized_df.memory_usage(deep=True).sum() / (1024**2)
-                st.success(f"Memory usage reduced from {original_memory:.2f} MB to {optimized_memory:.2f} MB.")
-                st.session_state.uploaded_data = optimized_df.copy()
-                edited_df = st.session_state.uploaded_data.copy()
-
+                # Only re-run the pass when the data actually changed since the last rerun
+                def optimize():
+                    upload_version, upload_key = st.session_state.get('upload_fingerprint', (None, None))
+                    result = optimize_cached(df, upload_key if upload_version == st.session_state.data_version else None)
+                    _set_uploaded_data(result.frame, changed=False)
+                    return result
+
+                optimization = _cached_for_version('optimization', optimize)
+                optimized_df = optimization.frame
+                profile = _cached_for_version('profile', lambda: profile_columns(optimized_df))
+                st.success(f"Memory usage reduced from {optimization.original_mb:.2f} MB to {optimization.optimized_mb:.2f} MB.")
+                edited_df = session_store().checkout('current')
+
+                render_profile.section("Overview charts")
                 # Pie Chart for Data Types
-                data_types = optimized_df.dtypes.value_counts().reset_index()
+                data_types = profile['dtype'].value_counts().reset_index()
                 data_types.columns = ['Type', 'Count']
 
                 type_map = {
@@ -191,15 +453,15 @@ def show_dashboard():
                 fig_pie.update_traces(textposition='inside', textinfo='percent+label')
 
             # Metrics
-            null_values = optimized_df.isnull().sum().sum()
+            null_values = profile['nulls'].sum()
             total_rows = len(optimized_df)
             total_columns = len(optimized_df.columns)
-            total_dtypes = optimized_df.dtypes.nunique()
+            total_dtypes = profile['dtype'].nunique()
 
             # Bar Chart for Uniqueness
             total_summary = pd.DataFrame({
-                'Column': optimized_df.columns,
-                'Count': optimized_df.nunique()
+                'Column': profile.index,
+                'Count': profile['distinct']
             })
             fig_bar = px.bar(total_summary, x='Column', y='Count', title='Total Summary of Data')
 
@@ -212,130 +474,136 @@ def show_dashboard():
             col2.metric("Columns", total_columns)
             col2.metric("Data Types", total_dtypes)
 
-            numeric_summary = df.describe().T[['mean', 'std', 'min', 'max']]
             col3.subheader("📊 Numeric Summary")
-            col3.dataframe(numeric_summary)
+            col3.dataframe(numeric_summary(profile))
 
             table_data = pd.DataFrame({
-                "Data Type": [type_map.get(str(dtype), str(dtype)) for dtype in optimized_df.dtypes],
-                "Unique Values": optimized_df.nunique(),
-                "Missing Values": optimized_df.isnull().sum(),
-                "Example Value": optimized_df.iloc[0] if not optimized_df.empty else None # Handle empty DataFrame
+                "Data Type": profile['dtype'].map(lambda dtype: type_map.get(dtype, dtype)),
+                "Unique Values": profile['distinct'],
+                "Missing Values": profile['nulls'],
+                "Example Value": profile['sample'],
             })
 
             st.subheader("📋 Data Dictionary")
             st.dataframe(table_data)
 
+            render_profile.section("Critical columns")
             # **Update original_data before displaying the editor**
-            st.session_state.original_data = st.session_state.uploaded_data.copy()
-            # Identify critical columns
-            critical_cols_to_highlight = identify_critical_columns(df.columns, CRITICAL_KEYWORDS)
+            st.session_state.original_data = session_store().put('original', st.session_state.uploaded_data)
+            # Identify critical columns by name and by sampled values
+            critical_reasons = _cached_for_version(
+                'critical_reasons', lambda: identify_sensitive_columns(optimized_df, CRITICAL_KEYWORDS)
+            )
+            critical_cols_to_highlight = list(critical_reasons)
             st.write(f"Identified potential critical columns: {critical_cols_to_highlight}") # For debugging
 
+            render_profile.section("Validation")
+            _show_validation(optimized_df, critical_reasons)
+
             col_configs = {}
             for col in optimized_df.columns:
                 if col in critical_cols_to_highlight:
+                    reason = critical_reasons[col]
                     col_configs[col] = column_config.Column(
                         label=f"⚠️ {col}", 
-                        help="This column is critical",
+                        help="This column is critical" if reason == 'keyword' else f"This column looks like {reason.replace('_', ' ')} data",
                         disabled=False,
                     )
                 else:
                     col_configs[col] = column_config.Column(label=col)
 
+            render_profile.section("Data editor")
             st.subheader("🧹 Clean & Edit Your Data")  
-            edited_df = st.data_editor(  
-                st.session_state.uploaded_data,  
-                use_container_width=True,  
-                num_rows="dynamic",  
-                key="editable_table",  
-                column_config=col_configs  
-            )  
-
-            # Check if data was edited by comparing with session state
-            if not edited_df.equals(st.session_state.uploaded_data):
-                st.session_state.uploaded_data = edited_df.copy()
-
-                # Auto-save to database  
-                table_name = st.session_state.uploaded_filename.split('.')[0]  
-                save_successful, message = save_dataframe_to_db(st.session_state.uploaded_data, table_name)  
-                if save_successful:  
-                    st.success("Changes saved to database automatically")  
-                else:  
-                    st.error(f"Error saving changes: {message}")
-
+            _show_edit_history()
+            if len(st.session_state.uploaded_data) > editor_window.FULL_EDITOR_MAX_ROWS:
+                # Large frames: only one page travels to the browser, and edits are merged back by row label
+                edited_df = _show_windowed_editor(col_configs)
+            else:
+                edited_df = st.data_editor(  
+                    st.session_state.uploaded_data,  
+                    use_container_width=True,  
+                    num_rows="dynamic",  
+                    key=f"editable_table_{st.session_state.editor_generation}",  
+                    column_config=col_configs  
+                )  
+
+                # Check if data was edited by comparing with session state
+                if not edited_df.equals(st.session_state.uploaded_data):
+                    _set_uploaded_data(edited_df, record="Edit cells")
+
+                    # Auto-save to database  
+                    table_name = st.session_state.uploaded_filename.split('.')[0]  
+                    save_successful, message = _save_with_progress(st.session_state.uploaded_data, table_name)  
+                    if save_successful:  
+                        st.success("Changes saved to database automatically")  
+                    else:  
+                        st.error(f"Error saving changes: {message}")
+
+            render_profile.section("Imputation")
             if st.session_state.uploaded_data is not None:
                 df = st.session_state.uploaded_data
 
                 # Detect columns with nulls
-                null_cols = df.columns[df.isnull().any()].tolist()
+                null_counts = _cached_for_version("null_counts_cache", lambda: df.isna().sum())
+                null_cols = null_counts.index[null_counts > 0].tolist()
 
                 if null_cols:
                     st.subheader("Null Value Imputation Options")
-
-                    selected_col = st.selectbox("Select column to impute nulls", null_cols)
-                    col_dtype = df[selected_col].dtype  # Define dtype here safely
-
-                    option = st.radio(
-                        f"How do you want to replace nulls in '{selected_col}'?",
-                        ('Mean', 'Zero', 'Custom Value')
+                    st.caption("Choose how to fill each column, then apply the whole plan at once. "
+                               "Mean, median, mode and forward fill can be computed per group of another column, "
+                               "e.g. the median amount per account.")
+                    default_strategy = st.selectbox("Start every column with", ["(none)", *impute.IMPUTE_STRATEGIES])
+                    plan_table = st.data_editor(
+                        pd.DataFrame({
+                            'Column': null_cols,
+                            'Nulls': null_counts[null_cols].to_numpy(),
+                            'Strategy': None if default_strategy == "(none)" else default_strategy,
+                            'Group by': None,
+                            'Value': None,
+                        }),
+                        hide_index=True,
+                        use_container_width=True,
+                        disabled=['Column', 'Nulls'],
+                        # A new data version or default starts a fresh plan
+                        key=f"impute_plan_{st.session_state.data_version}_{default_strategy}",
+                        column_config={
+                            'Strategy': column_config.SelectboxColumn(options=list(impute.IMPUTE_STRATEGIES),
+                                                                      help="Leave empty to keep the nulls"),
+                            'Group by': column_config.SelectboxColumn(options=[str(col) for col in df.columns],
+                                                                      help="Compute the statistic within each group"),
+                            'Value': column_config.TextColumn(help="Replacement for the 'value' strategy"),
+                        },
                     )
 
-                    replacement = None  # Initialize
-
-                    if option == 'Custom Value':
-                        custom_val = st.text_input("Enter your custom replacement value:")
-
-                        if custom_val.strip() == "":
-                            st.warning("Please enter a value.")
+                    if st.button("Apply Imputation Plan"):
+                        plan = [
+                            impute.ImputeStep(row['Column'], row['Strategy'],
+                                              row['Value'] if pd.notna(row['Value']) else None,
+                                              row['Group by'] if pd.notna(row['Group by']) else None)
+                            for row in plan_table.to_dict('records') if pd.notna(row['Strategy'])
+                        ]
+                        if not plan:
+                            st.warning("Choose a strategy for at least one column.")
                         else:
-                            # Try to convert custom_val to appropriate type based on col_dtype
-                            try:
-                                if np.issubdtype(col_dtype, np.integer):
-                                    val_float = float(custom_val)
-                                    if val_float.is_integer():
-                                        replacement = int(val_float)
-                                    else:
-                                        st.warning("Float will be truncated to int.")
-                                        replacement = int(val_float)
-                                elif np.issubdtype(col_dtype, np.floating):
-                                    replacement = float(custom_val)
+                            # The plan builds a new frame; only the filled columns are copied
+                            result = impute.apply_plan(session_store().checkout('current'), plan)
+                            for column, reason in result.skipped:
+                                st.warning(f"Skipped '{column}': {reason}")
+                            if result.filled:
+                                _set_uploaded_data(result.frame, record=f"Impute nulls in {len(result.filled)} columns",
+                                                   rows=result.rows)
+                                st.success(f"Filled {sum(result.filled.values()):,} nulls in "
+                                           f"{len(result.filled)} columns: {', '.join(map(str, result.filled))}")
+
+                                # One save for the whole plan
+                                table_name = st.session_state.uploaded_filename.split('.')[0]
+                                save_successful, message = _save_with_progress(result.frame, table_name)
+                                if save_successful:
+                                    st.success("Updated data saved to database.")
                                 else:
-                                    # For non-numeric columns, keep as string
-                                    replacement = custom_val
-                            except ValueError:
-                                st.error("Custom value must match the column data type.")
-
-                    if st.button("Replace Nulls"):
-                        if option == 'Mean':
-                            if np.issubdtype(col_dtype, np.number):
-                                replacement = df[selected_col].mean()
-                            else:
-                                st.error("Mean imputation only available for numeric columns.")
-                                replacement = None
-                        elif option == 'Zero':
-                            if np.issubdtype(col_dtype, np.number):
-                                replacement = 0
-                            else:
-                                st.error("Zero replacement only available for numeric columns.")
-                                replacement = None
-                        # For custom value, replacement was already set above
-
-                        if replacement is not None:
-                            df[selected_col].fillna(replacement, inplace=True)
-                            st.success(f"Null values in '{selected_col}' replaced with {replacement}")
-
-                            # Save back to session state
-                            st.session_state.uploaded_data = df.copy()
-
-                            # Save to DB immediately
-                            table_name = st.session_state.uploaded_filename.split('.')[0]
-                            save_successful, message = save_dataframe_to_db(df, table_name)
-                            if save_successful:
-                                st.success("Updated data saved to database.")
-                            else:
-                                st.error(f"Error saving changes: {message}")
+                                    st.error(f"Error saving changes: {message}")
 
+            render_profile.section("Column operations")
             # Column Operations
             st.subheader("🛠️ Column Operations")
 
@@ -354,8 +622,8 @@ def show_dashboard():
                 
                 if change_type_button:
                     try:
-                        # Create a copy of the DataFrame to modify
-                        modified_df = edited_df.copy()
+                        # Modify a snapshot; only the converted column is copied
+                        modified_df = session_store().checkout('current')
                         
                         if new_dtype == 'datetime64[ns]':
                             # Use pd.to_datetime and assign back to column
@@ -368,7 +636,7 @@ def show_dashboard():
                             modified_df[col_to_change] = modified_df[col_to_change].astype(new_dtype)
                         
                         # Update the session state with the modified DataFrame
-                        st.session_state.uploaded_data = modified_df
+                        _set_uploaded_data(modified_df, record=f"Change '{col_to_change}' to {new_dtype}")
                         st.success(f"Data type of '{col_to_change}' changed to '{new_dtype}'.")
                         
                     except Exception as e:
@@ -380,10 +648,11 @@ def show_dashboard():
                 if st.button("Delete Selected Columns"):
                     if columns_to_delete:
                         try:
-                            st.session_state.uploaded_data = st.session_state.uploaded_data.drop(columns=columns_to_delete)
+                            _set_uploaded_data(st.session_state.uploaded_data.drop(columns=columns_to_delete),
+                                               record=f"Delete {', '.join(columns_to_delete)}")
                             # Save immediately after deletion
                             table_name = st.session_state.uploaded_filename.split('.')[0]
-                            save_successful, message = save_dataframe_to_db(st.session_state.uploaded_data, table_name)
+                            save_successful, message = _save_with_progress(st.session_state.uploaded_data, table_name)
                             if save_successful:
                                 st.success(f"Deleted columns and saved: {', '.join(columns_to_delete)}")
                             else:
@@ -391,6 +660,7 @@ def show_dashboard():
                         except Exception as e:
                             st.error(f"Error: {e}")
                    
+            render_profile.section("Styled output")
             st.markdown("### 📦 Final Edited Data")
 
             # Always get the current and original data from session state
@@ -398,27 +668,36 @@ def show_dashboard():
             original_df = st.session_state.get('original_data')
 
             if final_df is not None and original_df is not None:
-                # Align columns and indexes
-                original_df = original_df[final_df.columns]
-                final_df.reset_index(drop=True, inplace=True)
-                original_df.reset_index(drop=True, inplace=True)
-
-                if final_df.shape[0] == original_df.shape[0]:
-                    styled_df = final_df.style.apply(
-                        lambda x: highlight_critical_and_edited(final_df, original_df, critical_cols_to_highlight),
+                shown_df, shown_original = final_df, original_df
+                if len(final_df) > editor_window.FULL_EDITOR_MAX_ROWS:
+                    # Style only the rows in the editor window rather than shipping the whole frame
+                    shown = edited_df.index[edited_df.index.isin(final_df.index) & edited_df.index.isin(original_df.index)]
+                    shown_df, shown_original = final_df.loc[shown], original_df.loc[shown]
+                # Align columns and indexes (without renumbering the session data, whose
+                # index is the row key used for incremental saves)
+                shown_original = shown_original[shown_df.columns].reset_index(drop=True)
+                shown_df = shown_df.reset_index(drop=True)
+
+                if shown_df.shape[0] == shown_original.shape[0]:
+                    cell_diff = compute_cell_diff(shown_df, shown_original, critical_cols_to_highlight)
+                    st.caption(f"{len(cell_diff.changed_cells)} edited cells in {len(cell_diff.changed_rows)} rows")
+                    styled_df = shown_df.style.apply(
+                        lambda x: highlight_critical_and_edited(shown_df, shown_original, critical_cols_to_highlight, diff=cell_diff),
                         axis=None
                     )
                     st.write(styled_df)
                 else:
-                    st.dataframe(final_df, use_container_width=True)
+                    st.dataframe(shown_df, use_container_width=True)
             else:
                 st.warning("No data found. Please upload a file.")
 
+            render_profile.section("Export")
             st.markdown("### 📥 Export Data")
             csv = final_df.to_csv(index=False).encode("utf-8")
             st.download_button("⬇️ Download CSV", csv, "updated_data.csv", "text/csv", key="downl")
                         
             
+            render_profile.section("SQL search")
             # Search SQL
             st.subheader("🔍 Search Database")
             search_input = st.text_area("Enter SQL query", key="database_search_input", height=150)
@@ -427,10 +706,29 @@ def show_dashboard():
                 user_role = st.session_state.get("user_role", "user")  # Default to 'user' if not set
 
                 if is_safe_sql(search_input, user_role):
+                    # Start with one page; "Load more" raises the cap for the same query
+                    if st.session_state.get('search_query') != search_input:
+                        st.session_state.search_query = search_input
+                        st.session_state.search_row_cap = SEARCH_PAGE_SIZE
                     try:
-                        results_df = search_database(search_input)
-                        if results_df is not None:
-                            st.dataframe(results_df)
+                        result = search_database_stream(search_input, row_cap=st.session_state.search_row_cap)
+                        if result.frame is not None:
+                            st.dataframe(result.frame)
+                            st.caption(
+                                f"{result.row_count:,} rows in {result.elapsed:.2f}s"
+                                + (" (cached)" if result.cached else "")
+                                + (" · more rows available" if result.truncated else "")
+                            )
+                            if result.timed_out:
+                                st.warning(f"Query stopped after {SEARCH_TIMEOUT_S}s; showing the rows fetched so far.")
+                            if result.truncated:
+                                if st.session_state.search_row_cap >= SEARCH_ROW_CAP:
+                                    st.info(f"Showing the first {SEARCH_ROW_CAP:,} rows. Refine the query to see more.")
+                                elif st.button("⬇️ Load more"):
+                                    st.session_state.search_row_cap = min(
+                                        st.session_state.search_row_cap + SEARCH_PAGE_SIZE * 4, SEARCH_ROW_CAP
+                                    )
+                                    st.rerun()
                         else:
                             st.info("No data returned for the query.")
                     except Exception as e:
@@ -438,15 +736,19 @@ def show_dashboard():
                 else:
                     st.error("⚠️ You are not allowed to run this type of SQL command.")
 
+            render_profile.section("Optional charts")
             # Optional Charts Section
             st.sidebar.subheader("Optional Charts")
             final_df = st.session_state.uploaded_data
+            # Charts are drawn from aggregates computed here, never from the raw rows
+            version = st.session_state.data_version
+            numeric_cols = final_df.select_dtypes(include='number').columns
 
             if st.sidebar.checkbox("🌡️ Correlation Heatmap"):
                 st.subheader("Correlation Heatmap")
-                numeric_cols = final_df.select_dtypes(include=['int64', 'float64']).columns
                 if len(numeric_cols) > 1:
-                    corr = final_df[numeric_cols].corr()
+                    corr = chart_data.cached_aggregate(version, ('corr', tuple(numeric_cols)),
+                                                       lambda: final_df[numeric_cols].corr())
                     fig_corr = px.imshow(corr, text_auto=True, color_continuous_scale="Viridis", title="Correlation Heatmap")
                     st.plotly_chart(fig_corr, use_container_width=True)
                 else:
@@ -454,24 +756,69 @@ def show_dashboard():
 
             if st.sidebar.checkbox("📊 Histogram (Frequency Distribution)"):
                 st.subheader("Histogram (Frequency Distribution)")
-                numeric_cols = final_df.select_dtypes(include=['int64', 'float64']).columns
                 if len(numeric_cols) > 0:
                     col_to_hist = st.selectbox("Select numeric column for histogram:", numeric_cols)
-                    fig_hist = px.histogram(final_df, x=col_to_hist, title=f"Frequency Distribution of {col_to_hist}")
+                    bins = chart_data.cached_aggregate(version, ('histogram', col_to_hist),
+                                                       lambda: chart_data.histogram_bins(final_df[col_to_hist]))
+                    fig_hist = px.bar(bins, x='mid', y='count', hover_data=['left', 'right'],
+                                      labels={'mid': col_to_hist, 'count': 'Count'},
+                                      title=f"Frequency Distribution of {col_to_hist}")
+                    fig_hist.update_traces(width=bins['right'] - bins['left'])
                     st.plotly_chart(fig_hist, use_container_width=True)
                 else:
                     st.warning("No numeric columns available for the histogram.")
 
+            if st.sidebar.checkbox("📶 Value Counts"):
+                st.subheader("Value Counts")
+                col_to_count = st.selectbox("Select column to count:", final_df.columns)
+                counts = chart_data.cached_aggregate(version, ('counts', col_to_count),
+                                                     lambda: chart_data.bar_counts(final_df[col_to_count]))
+                fig_counts = px.bar(counts, x='value', y='count', labels={'value': col_to_count, 'count': 'Count'},
+                                    title=f"Most Frequent Values of {col_to_count}")
+                st.plotly_chart(fig_counts, use_container_width=True)
+
+            if st.sidebar.checkbox("📈 Trend Chart"):
+                st.subheader("Trend Chart")
+                order_cols = final_df.select_dtypes(include=['number', 'datetime']).columns
+                if len(numeric_cols) > 0:
+                    col1, col2, col3 = st.columns(3)
+                    x_col = col1.selectbox("X axis:", order_cols)
+                    y_col = col2.selectbox("Y axis:", numeric_cols)
+                    methods = {'Shape (LTTB)': 'lttb', 'Extremes (min/max)': 'minmax'}
+                    method = methods[col3.radio("Downsampling:", list(methods), horizontal=True)]
+                    series = chart_data.cached_aggregate(version, ('trend', x_col, y_col, method),
+                                                         lambda: chart_data.downsample(final_df, x_col, y_col, method=method))
+                    fig_trend = px.line(series.frame, x=x_col, y=y_col, title=f"{y_col} by {x_col}")
+                    st.plotly_chart(fig_trend, use_container_width=True)
+                    if series.total_points > len(series.frame):
+                        st.caption(f"Showing {len(series.frame):,} of {series.total_points:,} points.")
+                else:
+                    st.warning("No numeric columns available for the trend chart.")
+
         else:
             st.warning("📂 Upload a file to see the dashboard.")
 
     # Database Page
     elif st.session_state.active_page == "Database":
+        render_profile.section("Database page")
         try:
+            from section.database import database_page
             database_page()
         except ImportError:
             st.error("The 'database.py' file or the 'database_page' function was not found.")
 
     # User Page
     elif st.session_state.active_page == "User":
+        render_profile.section("User page")
+        from section.user import user_page
         user_page()
+
+    # Diagnostics Page
+    elif st.session_state.active_page == "Diagnostics":
+        render_profile.section("Diagnostics page")
+        from section.diagnostics import diagnostics_page
+        diagnostics_page()
+
+    if profiling:
+        render_profile.finish_rerun()
+        _show_render_profile()
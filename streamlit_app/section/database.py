@@ -1,4 +1,4 @@
-from section.utils.helper import engine1
+from section.utils.helper import get_engine1, invalidate_table_caches, SYNTHETIC_ROW_KEY
 import streamlit as st
 from sqlalchemy import inspect, text
 import pandas as pd
@@ -9,61 +9,174 @@ def _is_admin():
 
 def _delete_table(table_name):
     """Dangerous: Delete a table from the database."""
-    with engine1.connect() as conn:
+    with get_engine1().connect() as conn:
         conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
         conn.commit()
+    invalidate_table_caches([table_name])
+
+PAGE_SIZES = [50, 100, 500, 1000]
+FILTER_OPERATORS = ["=", "!=", ">", ">=", "<", "<=", "LIKE"]
+NO_FILTER = "(no filter)"
+
+
+def _quote(name):
+    return get_engine1().dialect.identifier_preparer.quote(name)
+
 
 def _fetch_table_names():
     """Helper function to get table names."""
-    inspector = inspect(engine1)
+    inspector = inspect(get_engine1())
     return inspector.get_table_names()
 
-def _display_tables(table_names):
+
+def _fetch_table_metadata():
+    """Helper function to get table names, approximate row counts and sizes without reading any rows."""
+    if get_engine1().dialect.name == "mysql":
+        query = text("""
+            SELECT TABLE_NAME AS `table`,
+                   TABLE_ROWS AS `rows`,
+                   ROUND((DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024, 2) AS size_mb
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_NAME
+        """)
+        with get_engine1().connect() as conn:
+            return pd.read_sql(query, conn)
+    # Other backends have no information_schema sizes; list names only
+    return pd.DataFrame({"table": _fetch_table_names(), "rows": None, "size_mb": None})
+
+
+def _fetch_columns(table):
+    """Helper function to get column names and the column usable for keyset pagination."""
+    inspector = inspect(get_engine1())
+    columns = [col["name"] for col in inspector.get_columns(table)]
+    if SYNTHETIC_ROW_KEY in columns:
+        return columns, SYNTHETIC_ROW_KEY
+    primary_key = inspector.get_pk_constraint(table).get("constrained_columns") or []
+    if len(primary_key) == 1:
+        return columns, primary_key[0]
+    for index in inspector.get_indexes(table):
+        if index.get("unique") and len(index["column_names"]) == 1 and index["column_names"][0] in columns:
+            return columns, index["column_names"][0]
+    return columns, None
+
+
+def _fetch_page(table, columns, key_column, filter_spec, after_key, offset, limit):
+    """Helper function to read one page, by keyset when a key column exists and by OFFSET otherwise."""
+    select_cols = list(columns)
+    if key_column and key_column not in select_cols:
+        select_cols.append(key_column)
+
+    conditions, params = [], {"limit": limit}
+    if filter_spec:
+        column, operator, value = filter_spec
+        conditions.append(f"{_quote(column)} {operator} :filter_value")
+        params["filter_value"] = value
+    if key_column and after_key is not None:
+        conditions.append(f"{_quote(key_column)} > :after_key")
+        params["after_key"] = after_key
+
+    sql = f"SELECT {', '.join(_quote(c) for c in select_cols)} FROM {_quote(table)}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if key_column:
+        sql += f" ORDER BY {_quote(key_column)} LIMIT :limit"
+    else:
+        sql += " LIMIT :limit OFFSET :offset"
+        params["offset"] = offset
+
+    with get_engine1().connect() as conn:
+        return pd.read_sql(text(sql), conn, params=params)
+
+
+def _display_table_browser(table):
+    """Helper function to browse one table page by page."""
+    columns, key_column = _fetch_columns(table)
+
+    col1, col2 = st.columns([3, 1])
+    selected_columns = col1.multiselect("Columns", columns, default=columns, key=f"cols_{table}")
+    page_size = col2.selectbox("Rows per page", PAGE_SIZES, key=f"page_size_{table}")
+
+    fcol1, fcol2, fcol3 = st.columns([2, 1, 2])
+    filter_column = fcol1.selectbox("Filter column", [NO_FILTER] + columns, key=f"filter_col_{table}")
+    filter_op = fcol2.selectbox("Operator", FILTER_OPERATORS, key=f"filter_op_{table}")
+    filter_value = fcol3.text_input("Value", key=f"filter_value_{table}")
+    filter_spec = (filter_column, filter_op, filter_value) if filter_column != NO_FILTER and filter_value else None
+
+    # Page history holds the key (or offset) each visited page started after; reset when the query changes
+    state_key = f"page_state_{table}"
+    signature = (tuple(selected_columns), page_size, filter_spec)
+    if st.session_state.get(state_key, {}).get("signature") != signature:
+        st.session_state[state_key] = {"signature": signature, "starts": [None]}
+    starts = st.session_state[state_key]["starts"]
+    page_number = len(starts) - 1
+
+    after_key = starts[-1] if key_column else None
+    offset = page_number * page_size
+    page = _fetch_page(table, selected_columns or columns, key_column, filter_spec, after_key, offset, page_size)
+
+    visible = page[selected_columns or columns]
+    st.dataframe(visible, use_container_width=True)
+    st.caption(f"Page {page_number + 1} · {len(page)} rows" + (f" · keyset on `{key_column}`" if key_column else ""))
+
+    prev_col, next_col = st.columns(2)
+    if prev_col.button("◀ Previous", key=f"prev_{table}", disabled=page_number == 0):
+        starts.pop()
+        st.rerun()
+    if next_col.button("Next ▶", key=f"next_{table}", disabled=len(page) < page_size):
+        last_key = page[key_column].iloc[-1] if key_column else None
+        starts.append(last_key.item() if hasattr(last_key, "item") else last_key)
+        st.rerun()
+
+
+def _display_tables(table_metadata):
     """Helper function to display tables with admin controls."""
-    if not table_names:
+    if table_metadata.empty:
         st.warning("No tables found in the database.")
         return
 
-    st.success(f"Found {len(table_names)} tables.")
-    
-    for table in table_names:
-        with st.expander(f"📄 {table}"):
-            # Table content display
-            try:
-                df = pd.read_sql_table(table, con=engine1)
-                st.dataframe(df)
-                
-                # ADMIN-ONLY CONTROLS
-                if _is_admin():
-                    st.markdown("---")
-                    st.warning("🔐 Admin Actions")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        if st.button(f"❌ Delete {table}", key=f"delete_{table}"):
-                            _delete_table(table)
-                            st.rerun()  # Refresh the page
-                    
-                    with col2:
-                        if st.button(f"🔁 Refresh {table}", key=f"refresh_{table}"):
-                            st.rerun()
-                            
-            except Exception as e:
-                st.error(f"Error reading table {table}: {e}")
+    st.success(f"Found {len(table_metadata)} tables.")
+    st.dataframe(table_metadata, use_container_width=True, hide_index=True)
+
+    # Only the selected table is ever queried
+    table = st.selectbox("📄 Open table", table_metadata["table"].tolist(), index=None, placeholder="Choose a table")
+    if table is None:
+        return
+
+    try:
+        _display_table_browser(table)
+
+        # ADMIN-ONLY CONTROLS
+        if _is_admin():
+            st.markdown("---")
+            st.warning("🔐 Admin Actions")
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                if st.button(f"❌ Delete {table}", key=f"delete_{table}"):
+                    _delete_table(table)
+                    st.rerun()  # Refresh the page
+
+            with col2:
+                if st.button(f"🔁 Refresh {table}", key=f"refresh_{table}"):
+                    st.rerun()
+
+    except Exception as e:
+        st.error(f"Error reading table {table}: {e}")
 
 def database_page():
     """Displays the database page with admin controls."""
     st.title("🗃️ Database Tables")
     
     try:
-        table_names = _fetch_table_names()
+        table_metadata = _fetch_table_metadata()
         
         # ADMIN-ONLY WARNING
         if _is_admin():
             st.warning("⚠️ ADMIN MODE: You have table management privileges", icon="⚠️")
         
-        _display_tables(table_names)
+        _display_tables(table_metadata)
 
     except Exception as e:
         st.error(f"Database error: {e}")
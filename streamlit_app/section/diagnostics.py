@@ -0,0 +1,119 @@
+import streamlit as st
+import pandas as pd
+from section.utils import metrics
+from section.utils.snapshots import all_usage
+
+# Slowest statements listed on the page
+SLOW_STATEMENT_ROWS = 20
+
+
+def _is_admin():
+    return st.session_state.get('user_role') == 'admin'
+
+
+def _percentiles(values):
+    series = pd.Series(values, dtype='float64') * 1000
+    return {
+        "count": len(series),
+        "p50 ms": series.quantile(0.5),
+        "p95 ms": series.quantile(0.95),
+        "max ms": series.max(),
+    }
+
+
+def _display_pool():
+    st.subheader("🔌 Connection Pools")
+    checkouts = pd.DataFrame(metrics.checkout_samples(), columns=metrics.CheckoutSample._fields)
+    counters = metrics.counters()
+
+    rows = []
+    for name, (checked_out, capacity) in sorted(metrics.pool_status().items()):
+        engine_checkouts = checkouts[checkouts["engine"] == name]
+        saturated = engine_checkouts["capacity"].notna() & (engine_checkouts["checked_out"] >= engine_checkouts["capacity"])
+        rows.append({
+            "engine": name,
+            "checked out": checked_out,
+            "capacity": capacity,
+            **{f"checkout {k}": v for k, v in _percentiles(engine_checkouts["wait_s"]).items()},
+            "saturated checkouts": int(saturated.sum()),
+            "connects": counters.get((name, "connects"), 0),
+            "invalidations": counters.get((name, "invalidations"), 0),
+            "errors": counters.get((name, "errors"), 0),
+        })
+    if not rows:
+        st.info("No database engine has been used yet.")
+        return
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+    if not checkouts.empty:
+        checkouts["at"] = pd.to_datetime(checkouts["at"], unit="s")
+        checkouts["utilization"] = checkouts["checked_out"] / checkouts["capacity"]
+        st.caption("Pool utilization at each checkout")
+        st.line_chart(checkouts.pivot_table(index="at", columns="engine", values="utilization"))
+
+
+def _display_statements():
+    st.subheader("⏱️ Statements")
+    statements = pd.DataFrame(metrics.statement_samples(), columns=metrics.StatementSample._fields)
+    if statements.empty:
+        st.info("No statements recorded yet.")
+        return
+
+    # Group by the statement's leading keyword (SELECT, INSERT, ...) so similar work is summed together
+    statements["kind"] = statements["statement"].str.split(n=1).str[0].str.upper()
+    summary = statements.groupby(["engine", "kind"]).agg(
+        count=("elapsed_s", "size"),
+        total_s=("elapsed_s", "sum"),
+        p95_ms=("elapsed_s", lambda s: s.quantile(0.95) * 1000),
+        rows=("rowcount", "sum"),
+        errors=("error", "count"),
+    ).reset_index()
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    st.caption(f"Slowest {SLOW_STATEMENT_ROWS} statements")
+    slowest = statements.nlargest(SLOW_STATEMENT_ROWS, "elapsed_s").assign(
+        at=lambda df: pd.to_datetime(df["at"], unit="s"),
+        elapsed_ms=lambda df: df["elapsed_s"] * 1000,
+    )
+    st.dataframe(
+        slowest[["at", "engine", "elapsed_ms", "rowcount", "executemany", "error", "statement"]],
+        hide_index=True, use_container_width=True,
+    )
+
+
+def _display_sessions():
+    st.subheader("🧠 Session Memory")
+    usage = pd.DataFrame(all_usage(), columns=["owner", "versions", "logical_mb", "resident_mb"])
+    if usage.empty:
+        st.info("No session holds data yet.")
+        return
+    st.caption(f"{len(usage)} sessions hold {usage['resident_mb'].sum():,.1f} MB of DataFrames "
+               f"({usage['logical_mb'].sum():,.1f} MB if every version were a separate copy).")
+    st.dataframe(usage.sort_values("resident_mb", ascending=False), hide_index=True, use_container_width=True)
+
+
+def diagnostics_page():
+    """Admin-only view of pool and statement metrics recorded in this process."""
+    st.title("🩺 Diagnostics")
+    if not _is_admin():
+        st.error("Only admins can view diagnostics.")
+        return
+
+    st.caption(f"Last {metrics.METRICS_HISTORY:,} checkouts and statements recorded by this server process.")
+    _display_pool()
+    _display_statements()
+    _display_sessions()
+
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "⬇️ Export (Prometheus text format)",
+            metrics.to_prometheus(),
+            file_name="banking_dashboard_metrics.txt",
+            mime="text/plain",
+        )
+    with col2:
+        if st.button("🧹 Clear samples"):
+            metrics.reset()
+            st.rerun()
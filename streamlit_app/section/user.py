@@ -2,14 +2,73 @@ import streamlit as st
 import pandas as pd
 import hashlib
 import time 
-from section.utils.helper import engine2
+from section.utils.helper import get_engine2, invalidate_login_cache, compute_cell_diff
 from sqlalchemy import text
 
+# Columns the admin grid may change on existing users
+EDITABLE_USER_COLUMNS = ["userID", "username", "email"]
+
+
+def _records(df):
+    """Rows as dicts of plain Python values, with None for missing cells."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _diff_users(original_df, edited_df):
+    """Split editor changes into updated and deleted users, matched by editor row label.
+
+    Raises ValueError for changes the grid cannot save: new rows (they would have no password) and userIDs
+    taken by another remaining user, which includes swapping two users' IDs.
+    """
+    if (~edited_df.index.isin(original_df.index)).any():
+        raise ValueError("New users need a password; add them with the form below instead of the table.")
+    deleted = original_df.loc[~original_df.index.isin(edited_df.index)]
+
+    kept = edited_df.loc[edited_df.index.isin(original_df.index), EDITABLE_USER_COLUMNS]
+    diff = compute_cell_diff(kept, original_df[EDITABLE_USER_COLUMNS], [])
+    changed = kept.iloc[diff.changed_rows]
+    updated = changed.assign(original_userID=original_df.loc[changed.index, "userID"])
+
+    # Updates run one by one, so a new userID must not belong to any user left after the deletes
+    moved = updated[updated["userID"] != updated["original_userID"]]
+    remaining_ids = original_df.loc[original_df.index.isin(edited_df.index), "userID"]
+    taken = moved["userID"].isin(remaining_ids) | moved["userID"].duplicated(keep=False)
+    if taken.any():
+        raise ValueError(
+            f"User IDs already in use: {', '.join(map(str, moved.loc[taken, 'userID'].unique()))}. "
+            "To swap IDs, move one user to a free ID and save first."
+        )
+    return updated, deleted
+
+
+def _apply_user_changes(updated, deleted):
+    """Apply all changes as batched statements in one transaction; returns the affected row count."""
+    affected = 0
+    with get_engine2().begin() as conn:
+        # Deletes first so a freed userID can be reused by an update
+        if len(deleted):
+            result = conn.execute(
+                text("DELETE FROM user_information WHERE userID = :userID"),
+                _records(deleted[["userID"]]),
+            )
+            affected += result.rowcount
+        if len(updated):
+            result = conn.execute(text("""
+                UPDATE user_information
+                SET userID = :userID,
+                    username = :username,
+                    email = :email
+                WHERE userID = :original_userID
+            """), _records(updated))
+            affected += result.rowcount
+    return affected
+
+
 def user_page():
     st.title("👥 User Information")
 
     # Fetch users from the database
-    with engine2.connect() as conn:
+    with get_engine2().connect() as conn:
         df_users = pd.read_sql("SELECT * FROM user_information", conn)
 
     # Drop the password column before displaying
@@ -45,7 +104,7 @@ def user_page():
                         # Hash the password
                         hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
 
-                        with engine2.begin() as conn:
+                        with get_engine2().begin() as conn:
                             conn.execute(text("""
                                 INSERT INTO user_information (userID, username, email, password, role)
                                 VALUES (:userID, :username, :email, :password, 'User')
@@ -55,6 +114,7 @@ def user_page():
                                 "email": new_email,
                                 "password": hashed_password,
                             })
+                        invalidate_login_cache(new_username)
                         st.success("✅ New user added successfully.")
                         time.sleep(1.5)
                         st.rerun()
@@ -66,23 +126,13 @@ def user_page():
         if not edited_df.equals(original_df):
             if st.button("💾 Save Changes"):
                 try:
-                    with engine2.begin() as conn:
-                        for i in range(len(edited_df)):
-                            row = edited_df.iloc[i]
-                            original_userID = original_df.iloc[i]["userID"]  # original
-                            conn.execute(text(""" 
-                                UPDATE user_information
-                                SET userID = :new_userID,
-                                    username = :username,
-                                    email = :email
-                                WHERE userID = :original_userID
-                            """), {
-                                "new_userID": row["userID"],
-                                "username": row["username"],
-                                "email": row["email"],
-                                "original_userID": original_userID
-                            })
-                    st.success("Changes saved successfully.")
+                    updated, deleted = _diff_users(original_df, edited_df)
+                    affected = _apply_user_changes(updated, deleted)
+                    invalidate_login_cache()
+                    st.success(
+                        f"Changes saved successfully: {len(updated)} updated, {len(deleted)} deleted "
+                        f"({affected} rows affected)."
+                    )
                     time.sleep(1.5)
                     st.rerun()
                 except Exception as e:
@@ -95,8 +145,9 @@ def user_page():
 
         if st.button("Delete User"):
             try:
-                with engine2.begin() as conn:
+                with get_engine2().begin() as conn:
                     conn.execute(text("DELETE FROM user_information WHERE userID = :userID"), {"userID": selected_id})
+                invalidate_login_cache()
                 st.success(f"User with ID {selected_id} deleted.")
                 time.sleep(1.5)
                 st.rerun()
@@ -0,0 +1,117 @@
+import hashlib
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional
+import pandas as pd
+from section.utils import ingest, upload_cache
+from section.utils.optimize import OptimizationResult, align_frames, remember_optimization
+
+BATCH_WORKERS = min(4, os.cpu_count() or 1)
+# Archives are expanded in memory: by default their members may take no more than one upload's ingest budget
+BATCH_MAX_UNPACKED_MB = ingest.INGEST_MEMORY_BUDGET_MB
+SOURCE_COLUMN = "source_file"
+
+
+class FileReport(NamedTuple):
+    name: str
+    rows: int
+    seconds: float
+    error: Optional[str]
+    from_cache: bool
+
+
+class BatchResult(NamedTuple):
+    # None when no file could be read
+    frame: Optional[pd.DataFrame]
+    files: List[FileReport]
+    # Combined fingerprint the frame's optimization is cached under
+    key: Optional[str]
+
+
+def expand_uploads(uploaded_files, max_unpacked_mb: float = BATCH_MAX_UNPACKED_MB):
+    """(name, bytes) for every supported file, with zip archives replaced by their supported members.
+
+    Archives are refused once all of them together would unpack to more than max_unpacked_mb.
+    Returns (files, errors), errors being FileReports for archives or members that were skipped.
+    """
+    files, errors = [], []
+    unpacked_total = 0
+    for uploaded in uploaded_files:
+        uploaded.seek(0)
+        if ingest.split_extension(uploaded.name) != ('zip', None):
+            files.append((uploaded.name, uploaded.read()))
+            continue
+        try:
+            with zipfile.ZipFile(uploaded) as archive:
+                members = [m for m in archive.infolist() if not m.is_dir()
+                           and not os.path.basename(m.filename).startswith(('.', '__MACOSX'))
+                           and not m.filename.startswith('__MACOSX/')]
+                unpacked = sum(m.file_size for m in members)
+                if unpacked_total + unpacked > max_unpacked_mb * 1024**2:
+                    errors.append(FileReport(uploaded.name, 0, 0.0, f"Archive unpacks to {unpacked / 1024**2:,.0f} MB, "
+                                             f"over the {max_unpacked_mb:,.0f} MB limit for the batch", False))
+                    continue
+                unpacked_total += unpacked
+                for member in members:
+                    name = f"{uploaded.name}/{member.filename}"
+                    if ingest.is_supported(member.filename):
+                        files.append((name, archive.read(member)))
+                    else:
+                        errors.append(FileReport(name, 0, 0.0, "Unsupported file format", False))
+        except zipfile.BadZipFile as e:
+            errors.append(FileReport(uploaded.name, 0, 0.0, f"Zip Error: {e}", False))
+    return files, errors
+
+
+def _load_one(name: str, content: bytes, memory_budget_mb: float):
+    """Parse one file (in a worker process); returns (FileReport, OptimizationResult or None, cache key or None)."""
+    started = time.perf_counter()
+    upload, error = upload_cache.load_upload(ingest.InMemoryUpload(content, name), memory_budget_mb=memory_budget_mb)
+    seconds = time.perf_counter() - started
+    if error:
+        return FileReport(name, 0, seconds, error, False), None, None
+    return FileReport(name, len(upload.optimization.frame), seconds, None, upload.from_cache), upload.optimization, upload.key
+
+
+def load_batch(uploaded_files, memory_budget_mb: float = ingest.INGEST_MEMORY_BUDGET_MB,
+               workers: int = BATCH_WORKERS, progress_callback=None) -> BatchResult:
+    """Parse several uploads (zip archives included) in parallel and combine them into one frame.
+
+    Each file goes through the on-disk upload cache, so files seen before are not parsed again.
+    progress_callback(fraction, message) is called as files finish.
+    """
+    files, skipped = expand_uploads(uploaded_files, max_unpacked_mb=memory_budget_mb)
+    results = [None] * len(files)
+
+    def finished(position, result):
+        results[position] = result
+        if progress_callback:
+            done = len(results) - results.count(None)
+            progress_callback(done / len(files), f"Read {result[0].name} ({done} of {len(files)})")
+
+    if len(files) > 1 and workers > 1:
+        # spawn rather than fork: the Streamlit server process runs threads that must not be forked
+        with ProcessPoolExecutor(max_workers=min(workers, len(files)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(_load_one, name, content, memory_budget_mb): i
+                       for i, (name, content) in enumerate(files)}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+    else:
+        for i, (name, content) in enumerate(files):
+            finished(i, _load_one(name, content, memory_budget_mb))
+
+    reports = skipped + [report for report, _, _ in results]
+    loaded = [(report.name, optimization, key) for report, optimization, key in results if optimization is not None]
+    if not loaded:
+        return BatchResult(None, reports, None)
+
+    frame = align_frames([optimization.frame for _, optimization, _ in loaded], [name for name, _, _ in loaded],
+                         SOURCE_COLUMN)
+    key = hashlib.sha1("|".join(key for _, _, key in loaded).encode()).hexdigest()
+    original_mb = sum(optimization.original_mb for _, optimization, _ in loaded)
+    remember_optimization(key, OptimizationResult(frame, original_mb, frame.memory_usage(deep=True).sum() / 1024**2))
+    return BatchResult(frame, reports, key)
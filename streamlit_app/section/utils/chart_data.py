@@ -0,0 +1,111 @@
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Figures are built from these aggregates, so the browser receives at most this many marks per chart
+HISTOGRAM_BINS = 50
+BAR_TOP_CATEGORIES = 30
+MAX_SERIES_POINTS = 2000
+
+_SESSION_KEY = "chart_data_cache"
+
+
+class Downsampled(NamedTuple):
+    frame: pd.DataFrame
+    # Rows with both values present, before downsampling
+    total_points: int
+
+
+def histogram_bins(series: pd.Series, bins: int = HISTOGRAM_BINS) -> pd.DataFrame:
+    """Counts per bin of a numeric column as (left, right, mid, count) rows; nulls are left out.
+
+    Integer columns with a range narrower than bins get one bin per value, so counts stay exact.
+    """
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return pd.DataFrame({'left': [], 'right': [], 'mid': [], 'count': []})
+    low, high = values.min(), values.max()
+    if pd.api.types.is_integer_dtype(series) and high - low < bins:
+        edges = np.arange(low, high + 2) - 0.5
+    else:
+        edges = bins
+    counts, edges = np.histogram(values, bins=edges)
+    return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'mid': (edges[:-1] + edges[1:]) / 2, 'count': counts})
+
+
+def bar_counts(series: pd.Series, top: int = BAR_TOP_CATEGORIES) -> pd.DataFrame:
+    """Row counts of the most frequent values as (value, count) rows; the rest are summed into 'Other'."""
+    counts = series.value_counts(dropna=False)
+    if len(counts) > top:
+        counts = pd.concat([counts.iloc[:top], pd.Series({'Other': counts.iloc[top:].sum()})])
+    counts.index = counts.index.astype(str)
+    return counts.rename_axis('value').reset_index(name='count')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the points Largest-Triangle-Three-Buckets keeps out of x/y (x sorted ascending).
+
+    The first and last points are kept; from each bucket in between, the point forming the largest
+    triangle with the previously kept point and the mean of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(areas.argmax())
+        kept[i + 1] = previous
+    return kept
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the minimum and maximum of y in each of n_out / 2 equal buckets, in order."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = pd.Series(y).groupby(np.arange(n) * max(n_out // 2, 1) // n)
+    return np.union1d(buckets.idxmin().to_numpy(), buckets.idxmax().to_numpy())
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int = MAX_SERIES_POINTS, method: str = 'lttb') -> Downsampled:
+    """The x/y columns of df sorted by x and reduced to at most max_points rows that keep the series' shape.
+
+    method is 'lttb' (visually faithful lines) or 'minmax' (keeps every spike; cheaper on huge series).
+    """
+    points = pd.DataFrame({x: df[x], y: df[y]}).dropna().sort_values(x, kind='stable')
+    total = len(points)
+    if total > max_points:
+        y_values = points[y].to_numpy(dtype='float64')
+        if method == 'minmax':
+            kept = minmax_indices(y_values, max_points)
+        else:
+            x_values = points[x].to_numpy()
+            # Datetimes are compared as their integer time stamps
+            x_values = x_values.astype('int64') if x_values.dtype.kind in 'mM' else x_values.astype('float64')
+            kept = lttb_indices(x_values, y_values, max_points)
+        points = points.iloc[kept]
+    return Downsampled(points.reset_index(drop=True), total)
+
+
+def cached_aggregate(version, key, compute):
+    """The aggregate stored under key for this data version, computed on first use.
+
+    Everything cached for an older version is dropped as soon as a newer one is asked for.
+    """
+    cache = st.session_state.get(_SESSION_KEY)
+    if cache is None or cache[0] != version:
+        cache = (version, {})
+        st.session_state[_SESSION_KEY] = cache
+    if key not in cache[1]:
+        cache[1][key] = compute()
+    return cache[1][key]
@@ -0,0 +1,92 @@
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from section.utils.helper import compute_cell_diff
+
+# Frames longer than this are edited one window of rows at a time
+FULL_EDITOR_MAX_ROWS = 20_000
+EDITOR_PAGE_SIZE = 500
+
+
+class WindowMerge(NamedTuple):
+    frame: pd.DataFrame
+    # Labels of rows whose values changed, were removed or were added
+    touched_rows: pd.Index
+    rows_changed: bool
+
+
+def ordered_labels(df: pd.DataFrame, filter_column: Optional[str] = None, filter_text: str = "",
+                   sort_column: Optional[str] = None, ascending: bool = True) -> pd.Index:
+    """Row labels of df whose filter_column contains filter_text (case-insensitive), sorted by sort_column."""
+    labels = df.index
+    if filter_column is not None and filter_text:
+        column = df[filter_column]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Match the categories once instead of every row
+            categories = column.cat.categories
+            matching = categories[categories.astype(str).str.contains(filter_text, case=False, regex=False)]
+            matches = column.isin(matching)
+        else:
+            matches = column.astype(str).str.contains(filter_text, case=False, regex=False, na=False)
+        labels = labels[matches.to_numpy()]
+    if sort_column is not None:
+        column = df[sort_column] if labels is df.index else df[sort_column].loc[labels]
+        labels = column.sort_values(ascending=ascending, kind='stable', na_position='last').index
+    return labels
+
+
+def page_labels(labels: pd.Index, page: int, page_size: int = EDITOR_PAGE_SIZE) -> pd.Index:
+    """The labels shown on a 1-based page."""
+    return labels[(page - 1) * page_size:page * page_size]
+
+
+def page_count(labels: pd.Index, page_size: int = EDITOR_PAGE_SIZE) -> int:
+    return max(1, -(-len(labels) // page_size))
+
+
+def _widened(column: pd.Series, values: pd.Series) -> pd.Series:
+    """column in a dtype that can also hold values: new categories, a wider number type, or object for mixed kinds."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        candidates = pd.Index(values.dropna().unique())
+        return column.cat.add_categories(candidates[~candidates.isin(column.cat.categories)])
+    # Concatenating empty slices applies pandas' common-type rules: int8 and int64 give int64, Int8 and
+    # float64 give Float64, and only kinds that cannot share a dtype (e.g. numbers and text) give object
+    return column.astype(pd.concat([column.iloc[:0], values.infer_objects().iloc[:0]]).dtype)
+
+
+def merge_window(full: pd.DataFrame, window: pd.DataFrame, edited: pd.DataFrame) -> WindowMerge:
+    """Apply the edits made to window (a slice of full, by label) as returned by the editor.
+
+    Rows are matched by label: changed cells are written into full, rows missing from edited are removed
+    and rows with a new or blank label are appended under fresh labels. Only the written columns are copied;
+    removing or adding rows copies the frame.
+    """
+    merged = full.copy(deep=False)
+    # Labels are taken from window, so they keep full's index dtype even if a blank label made edited's float
+    present = window.index.isin(edited.index)
+    kept, removed = window.index[present], window.index[~present]
+    added = edited[~(edited.index.notna() & edited.index.isin(window.index))]
+
+    diff = compute_cell_diff(edited.loc[kept, window.columns], window.loc[kept], [])
+    touched = [kept[diff.edited.any(axis=1)], removed]
+    for j in np.flatnonzero(diff.edited.any(axis=0)):
+        col = window.columns[j]
+        labels = kept[diff.edited[:, j]]
+        values = edited.loc[labels, col]
+        try:
+            merged.loc[labels, col] = values.to_numpy()
+        except (TypeError, ValueError):
+            # A value the column's dtype cannot hold, e.g. out of range or a new category
+            merged[col] = _widened(merged[col], values)
+            merged.loc[labels, col] = values.to_numpy()
+
+    if len(removed):
+        merged = merged.drop(index=removed)
+    if len(added):
+        added = added[window.columns]
+        if pd.api.types.is_integer_dtype(full.index):
+            start = int(full.index.max()) + 1 if len(full) else 0
+            added = added.set_axis(pd.RangeIndex(start, start + len(added)))
+        merged = pd.concat([merged, added])
+        touched.append(added.index)
+    return WindowMerge(merged, touched[0].append(touched[1:]), bool(len(removed) or len(added)))
@@ -1,8 +1,22 @@
+import functools
 import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
-from typing import Optional
+from sqlalchemy import bindparam, create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+from typing import NamedTuple, Optional
 import streamlit as st
+from section.utils import metrics, query_cache
+from section.utils.patterns import detect_sensitive_columns
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,57 +46,562 @@ def get_db_config():
         logger.critical(error_msg)
         raise ValueError(error_msg)
 
-# Database Configuration
-try:
+# Engine pool defaults; override per deployment with POOL_SIZE / MAX_OVERFLOW / POOL_TIMEOUT in db_credentials
+ENGINE_POOL_SIZE = 5
+ENGINE_MAX_OVERFLOW = 10
+ENGINE_POOL_TIMEOUT = 30
+
+# SQLAlchemy engines are built on first use, not at import, so the login page renders without touching the database
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _build_engine(database_key):
     db_config = get_db_config()
-    DB_USER = db_config['user']
-    DB_PASS = db_config['password']
-    DB_HOST = db_config['host']
-    DB_PORT = db_config['port']
-    DB_NAME1 = db_config['database1']
-    DB_NAME2 = db_config['database2']
-
-except ValueError as e:
-    logger.critical(f"Configuration error: {str(e)}")
-    raise # Re-raise to stop the application
-
-# SQLAlchemy Engines
-engine1 = create_engine(
-    f'mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME1}',
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    connect_args={
-        'connect_timeout': 10,
+    credentials = st.secrets.db_credentials
+    return create_engine(
+        f"mysql+pymysql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config[database_key]}",
+        pool_size=int(credentials.get('POOL_SIZE', ENGINE_POOL_SIZE)),
+        max_overflow=int(credentials.get('MAX_OVERFLOW', ENGINE_MAX_OVERFLOW)),
+        pool_timeout=int(credentials.get('POOL_TIMEOUT', ENGINE_POOL_TIMEOUT)),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args={
+            'connect_timeout': 10,
+        }
+    )
+
+
+def get_engine(database_key):
+    """Return the engine for 'database1' (uploaded data) or 'database2' (users), building it once."""
+    engine = _engines.get(database_key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(database_key)
+            if engine is None:
+                try:
+                    engine = _build_engine(database_key)
+                except ValueError as e:
+                    logger.critical(f"Configuration error: {str(e)}")
+                    raise
+                metrics.instrument_engine(engine, database_key)
+                _engines[database_key] = engine
+    return engine
+
+
+def get_engine1():
+    return get_engine('database1')
+
+
+def get_engine2():
+    return get_engine('database2')
+
+
+def set_engine(database_key, engine):
+    """Use a pre-built engine (e.g. a local SQLite stand-in) instead of the configured MySQL one."""
+    metrics.instrument_engine(engine, database_key)
+    with _engines_lock:
+        _engines[database_key] = engine
+
+
+def __getattr__(name):
+    # Keep `helper.engine1` / `helper.engine2` working for existing callers, lazily
+    if name == 'engine1':
+        return get_engine1()
+    if name == 'engine2':
+        return get_engine2()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+SYNTHETIC_ROW_KEY = "_row_key"
+DELTA_BATCH_SIZE = 1000
+# Above this fraction of changed rows a full rewrite is cheaper than a delta
+DELTA_FULL_REWRITE_RATIO = 0.5
+
+# Last persisted state per table: the owner (session and upload) that wrote it, row key column, schema
+# and one hash per row. A snapshot is only used by the owner that wrote it.
+_persisted_tables = {}
+_persisted_lock = threading.Lock()
+
+
+def _safe_table_name(table_name: str) -> str:
+    """Convert table name to lowercase, safe format."""
+    return table_name.lower().replace(" ", "_")
+
+
+def _detect_row_key(df: pd.DataFrame) -> Optional[str]:
+    """Return an id-like column that is unique and non-null, or None to use the synthetic key."""
+    candidates = [c for c in df.columns if isinstance(c, str) and (c.lower() == "id" or c.lower().endswith("_id"))]
+    for col in candidates:
+        series = df[col]
+        if series.notna().all() and series.is_unique:
+            return col
+    return None
+
+
+def _row_hashes(df: pd.DataFrame, key_col: Optional[str]) -> pd.Series:
+    """One 64-bit hash per row, indexed by the row key."""
+    keys = df[key_col].to_numpy() if key_col else df.index.to_numpy()
+    return pd.Series(pd.util.hash_pandas_object(df, index=False).to_numpy(), index=keys)
+
+
+def _schema_of(df: pd.DataFrame):
+    return tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes)
+
+
+class _SnapshotMismatch(Exception):
+    """The table no longer holds the rows its snapshot describes."""
+
+
+def forget_persisted_table(table_name: str):
+    """Drop the change-tracking snapshot so the next save rewrites the table."""
+    with _persisted_lock:
+        _persisted_tables.pop(_safe_table_name(table_name), None)
+
+
+BULK_BATCH_SIZE = 10_000
+BULK_WRITERS = 4
+BULK_USE_LOAD_DATA = False
+# Rows are loaded into <table><STAGING_SUFFIX><random> and swapped in once complete
+STAGING_SUFFIX = "__staging_"
+
+
+def _rows_for_insert(chunk: pd.DataFrame):
+    """Convert a chunk to driver-friendly tuples (Python scalars, None for nulls)."""
+    columns = []
+    for col in chunk.columns:
+        series = chunk[col]
+        if series.dtype.kind == 'M':
+            # DBAPI drivers accept datetime.datetime but not pandas Timestamp
+            values = np.array(series.dt.to_pydatetime(), dtype=object)
+        else:
+            values = np.array(series, dtype=object)
+        values[series.isna().to_numpy()] = None
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+
+def _load_data_infile(frame: pd.DataFrame, table_name: str, engine):
+    """MySQL fast path: dump to a temporary CSV and LOAD DATA LOCAL INFILE it."""
+    csv_frame = frame.copy(deep=False)
+    for col in csv_frame.columns[csv_frame.dtypes == bool]:
+        csv_frame[col] = csv_frame[col].astype('int8')
+
+    # local_infile must be enabled on the client connection, so use a dedicated unpooled engine
+    infile_engine = create_engine(
+        engine.url,
+        poolclass=NullPool,
+        connect_args={'connect_timeout': 10, 'local_infile': True},
+    )
+    quote = engine.dialect.identifier_preparer.quote
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='', encoding='utf-8') as tmp:
+        csv_frame.to_csv(tmp, index=False, header=False, na_rep='\\N', lineterminator='\n')
+        path = tmp.name
+    try:
+        with infile_engine.begin() as conn:
+            conn.execute(text(
+                f"LOAD DATA LOCAL INFILE :path INTO TABLE {quote(table_name)} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                "LINES TERMINATED BY '\\n' "
+                f"({', '.join(quote(str(c)) for c in csv_frame.columns)})"
+            ), {'path': path})
+    finally:
+        os.remove(path)
+        infile_engine.dispose()
+
+
+def bulk_load_dataframe(df: pd.DataFrame, table_name: str, index_label: Optional[str] = None,
+                        batch_size: int = BULK_BATCH_SIZE, writers: int = BULK_WRITERS,
+                        use_load_data: bool = BULK_USE_LOAD_DATA, progress_callback=None, engine=None) -> int:
+    """Replace table_name with df using the fastest available path; returns the number of rows written.
+
+    Rows are loaded into a staging table created from an empty frame (so the schema matches to_sql),
+    either with LOAD DATA LOCAL INFILE (MySQL, opt-in) or as multi-row inserts of batch_size rows
+    spread over `writers` pooled connections. The staging table is then swapped in atomically, so
+    readers see the old table until the new one is complete and a failed load leaves it untouched.
+    """
+    engine = engine or get_engine1()
+    frame = df.reset_index(names=index_label) if index_label else df
+    staging_name = f"{table_name}{STAGING_SUFFIX}{uuid.uuid4().hex[:8]}"
+
+    frame.head(0).to_sql(staging_name, con=engine, if_exists='replace', index=False)
+    try:
+        written = _load_rows(frame, staging_name, engine, batch_size, writers, use_load_data, progress_callback)
+        _swap_in_table(engine, staging_name, table_name)
+    except Exception:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {engine.dialect.identifier_preparer.quote(staging_name)}"))
+        raise
+    return written
+
+
+def _swap_in_table(engine, staging_name: str, table_name: str):
+    """Replace table_name with staging_name in one step, dropping the previous table."""
+    quote = engine.dialect.identifier_preparer.quote
+    exists = inspect(engine).has_table(table_name)
+    if engine.dialect.name == 'mysql':
+        # A multi-table RENAME TABLE is atomic: no reader ever finds the table missing
+        old_name = f"{staging_name}_old"
+        with engine.begin() as conn:
+            if exists:
+                conn.execute(text(f"RENAME TABLE {quote(table_name)} TO {quote(old_name)}, "
+                                  f"{quote(staging_name)} TO {quote(table_name)}"))
+                conn.execute(text(f"DROP TABLE {quote(old_name)}"))
+            else:
+                conn.execute(text(f"RENAME TABLE {quote(staging_name)} TO {quote(table_name)}"))
+    else:
+        # Transactional DDL (SQLite, PostgreSQL): drop and rename commit together
+        with engine.begin() as conn:
+            if exists:
+                conn.execute(text(f"DROP TABLE {quote(table_name)}"))
+            conn.execute(text(f"ALTER TABLE {quote(staging_name)} RENAME TO {quote(table_name)}"))
+
+
+def _load_rows(frame: pd.DataFrame, table_name: str, engine, batch_size: int, writers: int,
+               use_load_data: bool, progress_callback) -> int:
+    """Append frame to the existing table_name; returns the number of rows written."""
+    total = len(frame)
+    if use_load_data and engine.dialect.name == 'mysql' and total:
+        try:
+            _load_data_infile(frame, table_name, engine)
+            if progress_callback:
+                progress_callback(total, total)
+            return total
+        except Exception as e:
+            logger.warning(f"LOAD DATA LOCAL INFILE failed for `{table_name}`, using batched inserts: {e}")
+
+    # Positional executemany goes straight to the DBAPI; pymysql rewrites it into multi-row INSERTs
+    quote = engine.dialect.identifier_preparer.quote
+    placeholder = '?' if engine.dialect.paramstyle == 'qmark' else '%s'
+    insert_sql = (
+        f"INSERT INTO {quote(table_name)} ({', '.join(quote(str(c)) for c in frame.columns)}) "
+        f"VALUES ({', '.join([placeholder] * len(frame.columns))})"
+    )
+
+    def write_chunk(start):
+        chunk = frame.iloc[start:start + batch_size]
+        with engine.begin() as conn:
+            conn.exec_driver_sql(insert_sql, _rows_for_insert(chunk))
+        return len(chunk)
+
+    starts = range(0, total, batch_size)
+    # SQLite allows a single writer at a time
+    n_writers = 1 if engine.dialect.name == 'sqlite' else max(1, min(writers, len(starts)))
+    written = 0
+    if n_writers == 1:
+        for start in starts:
+            written += write_chunk(start)
+            if progress_callback:
+                progress_callback(written, total)
+    else:
+        with ThreadPoolExecutor(max_workers=n_writers) as pool:
+            for future in as_completed([pool.submit(write_chunk, start) for start in starts]):
+                written += future.result()
+                if progress_callback:
+                    progress_callback(written, total)
+    return written
+
+
+def _full_save(df: pd.DataFrame, safe_table_name: str, progress_callback=None, owner=None):
+    """Replace the whole table and remember its state for later delta saves."""
+    key_col = _detect_row_key(df)
+    synthetic = key_col is None and df.index.is_unique
+    key_name = SYNTHETIC_ROW_KEY if synthetic else key_col
+    bulk_load_dataframe(
+        df, safe_table_name,
+        index_label=SYNTHETIC_ROW_KEY if synthetic else None,
+        progress_callback=progress_callback,
+    )
+
+    if key_name is None:
+        # No usable key at all: every save will be a full rewrite
+        forget_persisted_table(safe_table_name)
+        return
+
+    if synthetic or pd.api.types.is_numeric_dtype(df[key_col]):
+        # Index the key so delta deletes do not scan the table (TEXT keys cannot be indexed without a prefix)
+        try:
+            quote = get_engine1().dialect.identifier_preparer.quote
+            with get_engine1().begin() as conn:
+                conn.execute(text(
+                    f"CREATE INDEX {quote('ix_' + safe_table_name + '_key')} "
+                    f"ON {quote(safe_table_name)} ({quote(key_name)})"
+                ))
+        except Exception as e:
+            logger.warning(f"Could not index row key of `{safe_table_name}`: {e}")
+
+    with _persisted_lock:
+        _persisted_tables[safe_table_name] = {
+            'owner': owner,
+            'key': key_col,
+            'schema': _schema_of(df),
+            'hashes': _row_hashes(df, key_col),
+        }
+
+
+def compute_row_delta(df: pd.DataFrame, snapshot) -> Optional[dict]:
+    """Compare df with a persisted snapshot; return inserted/updated/deleted keys or None if a delta is not possible."""
+    key_col = snapshot['key']
+    if _schema_of(df) != snapshot['schema']:
+        return None
+    if key_col is None:
+        if not df.index.is_unique:
+            return None
+    elif df[key_col].isna().any() or not df[key_col].is_unique:
+        return None
+
+    hashes = _row_hashes(df, key_col)
+    previous = snapshot['hashes']
+
+    in_previous = hashes.index.isin(previous.index)
+    changed = ~in_previous
+    changed[in_previous] = hashes.to_numpy()[in_previous] != previous.reindex(hashes.index[in_previous]).to_numpy()
+    updated = in_previous & changed
+
+    return {
+        'hashes': hashes,
+        'write_mask': changed,
+        'inserted': hashes.index[~in_previous],
+        'updated': hashes.index[updated],
+        'deleted': previous.index[~previous.index.isin(hashes.index)],
     }
-)
-
-engine2 = create_engine(
-    f'mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME2}',
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    connect_args={
-        'connect_timeout': 10,
+
+
+def compute_row_delta_for(df: pd.DataFrame, snapshot, changed_rows) -> Optional[dict]:
+    """Like compute_row_delta, but only rows labelled in changed_rows are hashed; the rest are known unchanged.
+
+    Deletions (including rows whose key was edited) are still found by comparing key sets, which needs no hashing.
+    """
+    key_col = snapshot['key']
+    if _schema_of(df) != snapshot['schema'] or not df.index.is_unique:
+        return None
+    keys = df[key_col] if key_col else df.index.to_series()
+    if key_col is not None and (keys.isna().any() or not keys.is_unique):
+        return None
+
+    previous = snapshot['hashes']
+    touched = df.index.isin(changed_rows)
+    touched_hashes = _row_hashes(df[touched], key_col)
+
+    in_previous = touched_hashes.index.isin(previous.index)
+    changed = ~in_previous
+    changed[in_previous] = (touched_hashes.to_numpy()[in_previous]
+                            != previous.reindex(touched_hashes.index[in_previous]).to_numpy())
+    write_mask = np.zeros(len(df), dtype=bool)
+    write_mask[np.flatnonzero(touched)[changed]] = True
+
+    deleted = previous.index[~previous.index.isin(keys.to_numpy())]
+    hashes = previous.drop(deleted)
+    hashes = pd.concat([hashes[~hashes.index.isin(touched_hashes.index)], touched_hashes])
+    return {
+        'hashes': hashes,
+        'write_mask': write_mask,
+        'inserted': touched_hashes.index[~in_previous],
+        'updated': touched_hashes.index[in_previous & changed],
+        'deleted': deleted,
     }
-)
 
-def save_dataframe_to_db(df: pd.DataFrame, table_name: str):
+
+def _apply_delta(df: pd.DataFrame, safe_table_name: str, snapshot, delta):
+    """Send a delta as batched deletes plus multi-row inserts in one transaction.
+
+    Every deleted key must match exactly one row; otherwise the table was changed elsewhere, the transaction
+    is rolled back and _SnapshotMismatch is raised.
+    """
+    key_col = snapshot['key']
+    key_name = key_col or SYNTHETIC_ROW_KEY
+    quote = get_engine1().dialect.identifier_preparer.quote
+    delete_stmt = text(
+        f"DELETE FROM {quote(safe_table_name)} WHERE {quote(key_name)} IN :keys"
+    ).bindparams(bindparam('keys', expanding=True))
+
+    # Updated rows are deleted and re-inserted so no unique constraint is needed on the key
+    stale_keys = delta['updated'].append(delta['deleted']).tolist()
+    rows = df[delta['write_mask']]
+
+    with get_engine1().begin() as conn:
+        counts = [conn.execute(delete_stmt, {'keys': stale_keys[start:start + DELTA_BATCH_SIZE]}).rowcount
+                  for start in range(0, len(stale_keys), DELTA_BATCH_SIZE)]
+        # A negative rowcount means the driver does not report it
+        if all(count >= 0 for count in counts) and sum(counts) != len(stale_keys):
+            raise _SnapshotMismatch(f"{sum(counts)} of {len(stale_keys)} changed rows found")
+        if len(rows):
+            rows.to_sql(
+                safe_table_name, con=conn, if_exists='append',
+                index=key_col is None, index_label=SYNTHETIC_ROW_KEY if key_col is None else None,
+                method='multi', chunksize=DELTA_BATCH_SIZE,
+            )
+
+    with _persisted_lock:
+        _persisted_tables[safe_table_name] = {**snapshot, 'hashes': delta['hashes']}
+
+
+def save_dataframe_to_db(df: pd.DataFrame, table_name: str, incremental: bool = True, progress_callback=None,
+                         changed_rows=None, owner=None):
+    """Persist df, sending only changed rows when the table was last saved by the same owner in this process.
+
+    owner identifies who is saving (e.g. the session and upload); a snapshot written by another owner, of a
+    table that no longer exists, or whose changed rows are not all found in the table, is not trusted and the
+    table is rewritten. changed_rows, when
+    given, holds the labels of every row that may differ since that owner's last save (e.g. from its edit
+    journal), so only those rows are hashed; without an owner it is ignored, since the snapshot may come from
+    elsewhere. progress_callback(rows_written, total_rows) is called during full rewrites.
+    """
     try:
-        # Convert table name to lowercase, safe format
-        safe_table_name = table_name.lower().replace(" ", "_")
-        df.to_sql(safe_table_name, con=engine1, if_exists='replace', index=False)
+        safe_table_name = _safe_table_name(table_name)
+        with _persisted_lock:
+            snapshot = _persisted_tables.get(safe_table_name)
+        if snapshot is not None and snapshot['owner'] != owner:
+            snapshot = None
+        if incremental and snapshot is not None and not inspect(get_engine1()).has_table(safe_table_name):
+            logger.info(f"`{safe_table_name}` was dropped since it was last saved here, rewriting it")
+            snapshot = None
+
+        delta = None
+        if incremental and snapshot is not None:
+            try:
+                # The snapshot's owner matches here, so changed_rows describes the edits made since it was written
+                delta = (compute_row_delta(df, snapshot) if changed_rows is None or owner is None
+                         else compute_row_delta_for(df, snapshot, changed_rows))
+            except Exception as e:
+                logger.warning(f"Falling back to full save of `{safe_table_name}`: {e}")
+
+        if delta is not None:
+            n_changed = len(delta['inserted']) + len(delta['updated']) + len(delta['deleted'])
+            if n_changed == 0:
+                return True, f"No changes to save in `{safe_table_name}`."
+            if n_changed <= DELTA_FULL_REWRITE_RATIO * max(len(df), 1):
+                try:
+                    _apply_delta(df, safe_table_name, snapshot, delta)
+                    return True, (
+                        f"Saved changes to `{safe_table_name}`: {len(delta['inserted'])} inserted, "
+                        f"{len(delta['updated'])} updated, {len(delta['deleted'])} deleted rows."
+                    )
+                except _SnapshotMismatch as e:
+                    logger.info(f"`{safe_table_name}` changed since it was last saved here, rewriting it: {e}")
+
+        _full_save(df, safe_table_name, progress_callback, owner)
         return True, f"Data saved to `{safe_table_name}` successfully."
     except Exception as e:
+        # The table may now differ from the snapshot; force a rewrite next time
+        forget_persisted_table(table_name)
         return False, str(e)
+    finally:
+        query_cache.invalidate_tables([_safe_table_name(table_name)])
+
+
+SEARCH_PAGE_SIZE = 1_000
+SEARCH_ROW_CAP = 50_000
+SEARCH_TIMEOUT_S = 30
+
+_ROW_QUERY_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# MySQL errors for SELECTs that cannot be wrapped as a derived table (1060: duplicate column name)
+_DERIVED_TABLE_ERRORS = frozenset({1060})
+# MySQL error when MAX_EXECUTION_TIME stops a query
+_TIMEOUT_ERRORS = frozenset({3024})
+
+
+class SearchResult(NamedTuple):
+    frame: Optional[pd.DataFrame]
+    row_count: int
+    truncated: bool
+    timed_out: bool
+    elapsed: float
+    cached: bool = False
+
+
+def _capped_query(query: str, row_cap: int, timeout_s: Optional[float]) -> str:
+    """Wrap a SELECT so the server stops after row_cap + 1 rows (and, on MySQL, after timeout_s)."""
+    hint = ""
+    if timeout_s and get_engine1().dialect.name == "mysql":
+        hint = f"/*+ MAX_EXECUTION_TIME({int(timeout_s * 1000)}) */ "
+    return f"SELECT {hint}* FROM ({query.strip().rstrip(';')}) AS capped_query LIMIT {int(row_cap) + 1}"
+
+
+def _mysql_error_code(error: DBAPIError) -> Optional[int]:
+    args = getattr(error.orig, 'args', ())
+    return args[0] if args and isinstance(args[0], int) else None
+
+
+def _run_search(query: str, row_cap: Optional[int], page_size: int, timeout_s: Optional[float], started: float) -> SearchResult:
+    with get_engine1().begin() as conn:
+        # Server-side cursor: rows arrive page by page instead of all at once
+        result = conn.execution_options(stream_results=True).execute(text(query))
+        if not result.returns_rows:
+            return SearchResult(None, result.rowcount, False, False, time.perf_counter() - started)
+
+        columns = list(result.keys())
+        rows, truncated, timed_out = [], False, False
+        while True:
+            batch = result.fetchmany(page_size)
+            if not batch:
+                break
+            rows.extend(batch)
+            if row_cap is not None and len(rows) > row_cap:
+                del rows[row_cap:]
+                truncated = True
+                break
+            if timeout_s and time.perf_counter() - started > timeout_s:
+                timed_out = True
+                break
+        result.close()
+
+    return SearchResult(pd.DataFrame(rows, columns=columns), len(rows), truncated, timed_out,
+                        time.perf_counter() - started)
+
+
+def invalidate_table_caches(tables=None):
+    """Forget cached query results and delta snapshots for tables that were written outside save_dataframe_to_db."""
+    query_cache.invalidate_tables(tables)
+    if tables is None or {t.lower() for t in tables} & {"user_information", "admin_information"}:
+        invalidate_login_cache()
+    if tables is None:
+        with _persisted_lock:
+            _persisted_tables.clear()
+    else:
+        for table in tables:
+            forget_persisted_table(table)
+
+
+def search_database_stream(query: str, row_cap: Optional[int] = SEARCH_ROW_CAP, page_size: int = SEARCH_PAGE_SIZE,
+                           timeout_s: Optional[float] = SEARCH_TIMEOUT_S, use_cache: bool = True) -> SearchResult:
+    """Run a query, fetching at most row_cap rows page by page and giving up after timeout_s seconds.
+
+    Results of read queries are cached until their TTL expires or one of the tables they read is written.
+    """
+    is_read = bool(_ROW_QUERY_RE.match(query))
+    if use_cache and is_read:
+        cached = query_cache.get(query, row_cap)
+        if cached is not None:
+            return cached._replace(cached=True)
+
+    started = time.perf_counter()
+    result = None
+    if row_cap is not None and is_read:
+        try:
+            result = _run_search(_capped_query(query, row_cap, timeout_s), row_cap, page_size, timeout_s, started)
+        except DBAPIError as e:
+            code = _mysql_error_code(e)
+            if code in _TIMEOUT_ERRORS:
+                # The server gave up before the first page; re-running uncapped would not be bounded
+                result = SearchResult(pd.DataFrame(), 0, False, True, time.perf_counter() - started)
+            elif code in _DERIVED_TABLE_ERRORS:
+                logger.info(f"Query cannot be row-capped, running it as written: {e}")
+            else:
+                raise
+    if result is None:
+        result = _run_search(query, row_cap, page_size, timeout_s, started)
+
+    if not is_read:
+        # Anything else may have written; drop what depends on the tables it names (or everything)
+        invalidate_table_caches(query_cache.referenced_tables(query) or None)
+    elif use_cache and result.frame is not None and not result.timed_out:
+        query_cache.put(query, row_cap, result)
+    return result
+
 
-    
 def search_database(query: str) -> Optional[pd.DataFrame]:
     try:
-        with engine1.begin() as conn:
-            result = conn.execute(text(query))
-            if result.returns_rows:
-                return pd.DataFrame(result.fetchall(), columns=result.keys())
-            else:
-                return None
+        return search_database_stream(query, row_cap=None, timeout_s=None, use_cache=False).frame
     except Exception as e:
         raise e  # Re-raise the exception to be handled by the caller
  
@@ -92,7 +611,7 @@ def insert_user(user_id, username, password, email, timestamp, role):
         INSERT INTO user_information (userID, username, password, email, signup_time, role)
         VALUES (:userID, :username, :password, :email, :signup_time, :role)
     """)
-    with engine2.connect() as conn:
+    with get_engine2().connect() as conn:
         conn.execute(query, {
             "userID": user_id,
             "username": username,
@@ -102,13 +621,14 @@ def insert_user(user_id, username, password, email, timestamp, role):
             "role": role
         })
         conn.commit()
+    invalidate_login_cache(username)
 
 def insert_admin(user_id, username, password, email, timestamp, role):
     query = text("""
         INSERT INTO admin_information (userID, username, password, email, signup_time, role)
         VALUES (:userID, :username, :password, :email, :signup_time, :role)
     """)
-    with engine2.connect() as conn:
+    with get_engine2().connect() as conn:
         conn.execute(query, {
             "userID": user_id,
             "username": username,
@@ -118,11 +638,12 @@ def insert_admin(user_id, username, password, email, timestamp, role):
             "role": role
         })
         conn.commit()
+    invalidate_login_cache(username)
 
 
 def get_user_by_username(username):
     query = text("SELECT * FROM user_information WHERE username = :username")
-    with engine2.connect() as conn:
+    with get_engine2().connect() as conn:
         result = conn.execute(query, {"username": username}).fetchone()
         if result:
             return result._mapping
@@ -130,11 +651,58 @@ def get_user_by_username(username):
 
 def get_admin_by_username(username):
     query = text("SELECT * FROM admin_information WHERE username = :username")
-    with engine2.connect() as conn:
+    with get_engine2().connect() as conn:
         result = conn.execute(query, {"username": username}).fetchone()
         if result:
             return result._mapping
         return None
+
+
+LOGIN_CACHE_TTL_S = 60
+LOGIN_CACHE_SIZE = 2048
+
+# username -> (expires_at, ((role, password hash), ...)); an empty tuple caches an unknown username
+_login_cache = OrderedDict()
+_login_lock = threading.Lock()
+
+
+def get_login_credentials(username):
+    """Return ((role, password hash), ...) for username from both user tables, users first.
+
+    One round trip fetches both tables; results (including "no such user") are cached briefly.
+    """
+    now = time.monotonic()
+    with _login_lock:
+        entry = _login_cache.get(username)
+        if entry is not None and entry[0] > now:
+            _login_cache.move_to_end(username)
+            return entry[1]
+
+    query = text("""
+        SELECT 'user' AS role, password FROM user_information WHERE username = :username
+        UNION ALL
+        SELECT 'admin' AS role, password FROM admin_information WHERE username = :username
+    """)
+    with get_engine2().connect() as conn:
+        rows = conn.execute(query, {"username": username}).fetchall()
+    # UNION ALL does not guarantee order; users are checked before admins as before
+    credentials = tuple(sorted(((row.role, row.password) for row in rows), key=lambda r: r[0] != 'user'))
+
+    with _login_lock:
+        _login_cache[username] = (now + LOGIN_CACHE_TTL_S, credentials)
+        _login_cache.move_to_end(username)
+        while len(_login_cache) > LOGIN_CACHE_SIZE:
+            _login_cache.popitem(last=False)
+    return credentials
+
+
+def invalidate_login_cache(username=None):
+    """Forget cached credentials for username, or for everyone."""
+    with _login_lock:
+        if username is None:
+            _login_cache.clear()
+        else:
+            _login_cache.pop(username, None)
     
 CRITICAL_KEYWORDS = [
     # Account/Customer Basics
@@ -167,50 +735,123 @@ CRITICAL_KEYWORDS = [
 ]
 
 
+@functools.lru_cache(maxsize=8)
+def _keyword_matcher(keywords: tuple):
+    """One compiled alternation for all keywords (longest first), built once per keyword list."""
+    alternation = "|".join(re.escape(k.lower()) for k in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(alternation)
+
+
+@functools.lru_cache(maxsize=64)
+def _critical_for_columns(columns: tuple, keywords: tuple) -> tuple:
+    matcher = _keyword_matcher(keywords)
+    return tuple(col for col in columns if matcher.search(str(col).lower()))
+
+
 def identify_critical_columns(df_columns, keywords=CRITICAL_KEYWORDS):
     """Identifies potential critical columns based on keywords."""
-    critical_cols = set()
-    for col in df_columns:
-        lower_col = col.lower()
-        for keyword in keywords:
-            if keyword in lower_col:
-                critical_cols.add(col)
-                break  # Move to the next column once a keyword is found
-    return list(critical_cols)
-
-def highlight_critical_and_edited(df, original_df, critical_columns):
-    """Highlight edited (green), null (yellow), and critical (orange) cells, in priority order."""
+    return list(_critical_for_columns(tuple(df_columns), tuple(keywords)))
+
+
+def identify_sensitive_columns(df: pd.DataFrame, keywords=CRITICAL_KEYWORDS) -> dict:
+    """Critical columns by name plus columns whose values look like accounts, cards, emails or IBANs.
 
-    styles = pd.DataFrame("", index=df.index, columns=df.columns)
+    Maps column -> reason ('keyword' or the detected value kind).
+    """
+    reasons = {col: 'keyword' for col in identify_critical_columns(df.columns, keywords)}
+    for col, kind in detect_sensitive_columns(df).items():
+        reasons.setdefault(col, kind)
+    return reasons
 
-    for col in df.columns:
-        for i in df.index:
-            val_df = df.at[i, col]
-            val_orig = original_df.at[i, col] if col in original_df.columns and i in original_df.index else None
 
-            # Start with no style
-            style = ""
+EDITED_STYLE = 'background-color: #90ee90; color: black;'  # light green
+NULL_STYLE = 'background-color: yellow;'
+CRITICAL_STYLE = 'background-color: #ffd8a8; color: black;'  # light orange
 
-            # Check if edited
-            edited = False
-            if val_orig is not None:
-                if pd.isnull(val_orig) and pd.isnull(val_df):
-                    edited = False
-                elif str(val_df) != str(val_orig):
-                    edited = True
-            elif pd.notnull(val_df):
-                edited = True  # New non-null value where there was None
 
-            if edited:
-                style = 'background-color: #90ee90; color: black;'  # light green
-            elif pd.isnull(val_df):
-                style = 'background-color: yellow;'
-            elif col in critical_columns:
-                style = 'background-color: #ffd8a8; color: black;'  # light orange
+class CellDiff(NamedTuple):
+    """Boolean cell masks (rows x columns, aligned with the edited frame)."""
+    edited: np.ndarray
+    null: np.ndarray
+    critical: np.ndarray
 
-            styles.at[i, col] = style
+    @property
+    def changed_cells(self) -> np.ndarray:
+        """(row position, column position) pairs of every edited cell."""
+        return np.argwhere(self.edited)
+
+    @property
+    def changed_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.edited.any(axis=1))
+
+    @property
+    def changed_columns(self) -> np.ndarray:
+        return np.flatnonzero(self.edited.any(axis=0))
+
+
+def _column_edited_mask(current: pd.Series, original: pd.Series) -> np.ndarray:
+    """Vectorized equivalent of comparing str(current) with str(original) cell by cell."""
+    cur_null = current.isna().to_numpy()
+    orig_null = original.isna().to_numpy()
+    # Values are only compared where both sides are present: nullable dtypes (Int64, boolean) cannot compare NA
+    both = ~cur_null & ~orig_null
+    differ = np.zeros(len(current), dtype=bool)
+    if both.any():
+        current, original = current[both], original[both]
+        if current.dtype == original.dtype and current.dtype.kind in "biufcmM":
+            differ[both] = current.to_numpy() != original.to_numpy()
+        else:
+            # Mixed or object dtypes: compare the string forms, like the original loop did
+            differ[both] = (np.asarray(current, dtype=object).astype(str)
+                            != np.asarray(original, dtype=object).astype(str))
+
+    return (cur_null != orig_null) | differ
+
+
+def compute_cell_diff(df: pd.DataFrame, original_df: Optional[pd.DataFrame], critical_columns) -> CellDiff:
+    """Compute edited, null and critical masks column by column with array operations."""
+    n_rows, n_cols = df.shape
+    null = df.isna().to_numpy()
+    critical = np.broadcast_to(df.columns.isin(list(critical_columns)), (n_rows, n_cols))
+    edited = np.zeros((n_rows, n_cols), dtype=bool)
+
+    if original_df is None:
+        edited[:] = ~null
+        return CellDiff(edited, null, critical)
+
+    same_index = df.index.equals(original_df.index)
+    if not same_index:
+        rows_present = df.index.isin(original_df.index)
+        shared_labels = df.index[rows_present]
+
+    for j, col in enumerate(df.columns):
+        if col not in original_df.columns:
+            # Whole column is new: every non-null value counts as an edit
+            edited[:, j] = ~null[:, j]
+            continue
+
+        orig_col = original_df[col]
+        if same_index:
+            edited[:, j] = _column_edited_mask(df[col], orig_col)
+        else:
+            # Rows missing from the original count as new; the rest are compared by label
+            edited[:, j] = ~null[:, j]
+            edited[rows_present, j] = _column_edited_mask(df[col][rows_present], orig_col.loc[shared_labels])
+
+    return CellDiff(edited, null, critical)
+
+
+def highlight_critical_and_edited(df, original_df, critical_columns, diff: Optional[CellDiff] = None):
+    """Highlight edited (green), null (yellow), and critical (orange) cells, in priority order."""
+    if diff is None:
+        diff = compute_cell_diff(df, original_df, critical_columns)
 
-    return styles
+    # Lowest priority first so that later assignments win
+    styles = np.full(diff.edited.shape, "", dtype=object)
+    styles[diff.critical] = CRITICAL_STYLE
+    styles[diff.null] = NULL_STYLE
+    styles[diff.edited] = EDITED_STYLE
+    return pd.DataFrame(styles, index=df.index, columns=df.columns)
 
 DANGEROUS_COMMANDS = ["DROP", "DELETE"]
 
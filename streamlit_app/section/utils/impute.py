@@ -0,0 +1,179 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+IMPUTE_STRATEGIES = ('mean', 'median', 'mode', 'zero', 'ffill', 'value')
+# Strategies whose statistic can be computed within groups of another column
+GROUPABLE_STRATEGIES = ('mean', 'median', 'mode', 'ffill')
+# Group statistics are computed on the rows of groups with nulls only when those are at most this share of rows
+GROUP_SUBSET_FRACTION = 0.5
+
+
+class ImputeStep(NamedTuple):
+    column: str
+    strategy: str
+    # Replacement for the 'value' strategy as entered; converted to the column's type
+    value: Optional[str] = None
+    # Column whose groups the statistic is computed within, e.g. the median amount per account_id
+    group_by: Optional[str] = None
+
+
+class ImputeResult(NamedTuple):
+    frame: pd.DataFrame
+    # Nulls filled per column, for the columns the plan changed
+    filled: Dict[str, int]
+    # Labels of the rows that had at least one null filled
+    rows: pd.Index
+    # (column, reason) for steps that were not applied
+    skipped: List[Tuple[str, str]]
+
+
+def _is_plain_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def convert_value(series: pd.Series, text: str):
+    """text as a value of series' type; raises ValueError if it is not one."""
+    text = text.strip()
+    if pd.api.types.is_bool_dtype(series):
+        if text.lower() not in ('true', 'false'):
+            raise ValueError(f"'{text}' is not true or false")
+        return text.lower() == 'true'
+    if pd.api.types.is_integer_dtype(series):
+        number = float(text)
+        if not number.is_integer():
+            raise ValueError(f"'{text}' is not a whole number")
+        return int(number)
+    if pd.api.types.is_float_dtype(series):
+        return float(text)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Timestamp(text)
+    return text
+
+
+def check_step(df: pd.DataFrame, step: ImputeStep) -> Optional[str]:
+    """Why step cannot be applied to df, or None if it can."""
+    if step.column not in df.columns:
+        return "not in the data"
+    if step.strategy not in IMPUTE_STRATEGIES:
+        return f"unknown strategy '{step.strategy}'"
+    series = df[step.column]
+    if step.strategy == 'zero' and not _is_plain_numeric(series):
+        return "zero is only available for numeric columns"
+    if step.strategy in ('mean', 'median') and not (_is_plain_numeric(series)
+                                                    or pd.api.types.is_datetime64_any_dtype(series)):
+        return f"{step.strategy} is only available for numeric and date columns"
+    if step.strategy == 'value':
+        if step.value is None or not step.value.strip():
+            return "no replacement value given"
+        try:
+            convert_value(series, step.value)
+        except ValueError as e:
+            return f"replacement does not match the column type ({e})"
+    if step.group_by is not None:
+        if step.strategy not in GROUPABLE_STRATEGIES:
+            return f"{step.strategy} cannot be computed per group"
+        if step.group_by not in df.columns:
+            return f"group column '{step.group_by}' is not in the data"
+        if step.group_by == step.column:
+            return "a column cannot be grouped by itself"
+    return None
+
+
+def _group_stats(df: pd.DataFrame, columns: List[str], group_by: str, strategy: str) -> Dict[str, pd.Series]:
+    """Row-aligned mean or median of each column within the row's group.
+
+    Only groups with a null in one of columns are aggregated; the result is null elsewhere.
+    """
+    keys = df[group_by]
+    has_null = df[columns].isna().to_numpy().any(axis=1)
+    in_null_groups = keys.isin(keys[has_null].unique()).to_numpy()
+    source = df if in_null_groups.mean() > GROUP_SUBSET_FRACTION else df[in_null_groups]
+    stats = getattr(source.groupby(group_by, observed=True)[columns], strategy)()
+    if stats.empty:
+        return {}
+    # One hash lookup per row, shared by all columns of the batch
+    codes = stats.index.get_indexer(keys)
+    found = codes >= 0
+    positions = np.where(found, codes, 0)
+    return {col: stats[col].take(positions).where(found).set_axis(df.index) for col in columns}
+
+
+def _group_modes(df: pd.DataFrame, column: str, group_by: str) -> pd.Series:
+    """The most frequent value of column within each row's group (ties go to the smallest value), row-aligned."""
+    counts = df.groupby([group_by, column], observed=True, sort=True).size()
+    if counts.empty:
+        return pd.Series(np.nan, index=df.index)
+    top = counts.groupby(level=0, observed=True, sort=False).idxmax()
+    modes = pd.Series([value for _, value in top], index=top.index)
+    return df[group_by].map(modes)
+
+
+def _fill(series: pd.Series, values) -> pd.Series:
+    """series with its nulls replaced by values (a scalar, or a Series aligned with it), keeping the dtype."""
+    if pd.api.types.is_integer_dtype(series):
+        # Means and medians of a nullable integer column are rounded to stay integers
+        values = values.round() if isinstance(values, pd.Series) else round(values)
+    if isinstance(series.dtype, pd.CategoricalDtype) and not isinstance(values, pd.Series) \
+            and values not in series.cat.categories:
+        series = series.cat.add_categories([values])
+    return series.fillna(values)
+
+
+def apply_plan(df: pd.DataFrame, plan: List[ImputeStep]) -> ImputeResult:
+    """Fill the nulls of every column in plan at once, returning a new frame; df is not modified.
+
+    Statistics are computed from df as it was before the plan, so the order of the steps does not matter
+    (a later step for the same column replaces an earlier one). Steps sharing a strategy and group column
+    are computed together: one aggregation, or one groupby pass, for all of their columns. Nulls in rows
+    whose group has no value, or before a column's first value for ffill, stay null.
+    Only the filled columns are copied.
+    """
+    skipped, steps = [], {}
+    for step in plan:
+        reason = check_step(df, step)
+        if reason:
+            skipped.append((step.column, reason))
+        else:
+            steps[step.column] = step
+
+    batches: Dict[tuple, List[str]] = {}
+    for step in steps.values():
+        batches.setdefault((step.strategy, step.group_by), []).append(step.column)
+
+    fills = {}
+    for (strategy, group_by), columns in batches.items():
+        if strategy == 'zero':
+            fills.update({col: 0 for col in columns})
+        elif strategy == 'value':
+            fills.update({col: convert_value(df[col], steps[col].value) for col in columns})
+        elif strategy == 'ffill':
+            source = df[columns] if group_by is None else df.groupby(group_by, observed=True)[columns]
+            fills.update(source.ffill().items())
+        elif strategy == 'mode' and group_by is not None:
+            fills.update({col: _group_modes(df, col, group_by) for col in columns})
+        elif strategy == 'mode':
+            modes = df[columns].mode(dropna=True)
+            fills.update({col: modes[col].iloc[0] for col in columns if len(modes) and pd.notna(modes[col].iloc[0])})
+        elif group_by is not None:
+            fills.update(_group_stats(df, columns, group_by, strategy))
+        else:
+            stats = getattr(df[columns], strategy)()
+            fills.update({col: stats[col] for col in columns if pd.notna(stats[col])})
+
+    frame = df.copy(deep=False)
+    filled, touched = {}, np.zeros(len(df), dtype=bool)
+    for col, values in fills.items():
+        was_null = df[col].isna().to_numpy()
+        if not was_null.any():
+            continue
+        column = _fill(df[col], values)
+        now_filled = was_null & column.notna().to_numpy()
+        if now_filled.any():
+            frame[col] = column
+            filled[col] = int(now_filled.sum())
+            touched |= now_filled
+    for col in steps:
+        if col not in filled and df[col].isna().any():
+            skipped.append((col, "no values to compute a replacement from"))
+    return ImputeResult(frame, filled, df.index[touched], skipped)
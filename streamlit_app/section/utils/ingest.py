@@ -0,0 +1,456 @@
+import bz2
+import codecs
+import gzip
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from section.utils.optimize import align_frames, concat_chunks, optimize_dtypes
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pyarrow is optional; pandas' C parser is used instead, and Parquet/Feather are unavailable
+    pa = None
+    pa_csv = None
+    pa_feather = None
+    pa_parquet = None
+
+try:
+    import zstandard
+except ImportError:  # .zst files are decompressed by pyarrow instead
+    zstandard = None
+
+try:
+    import python_calamine  # noqa: F401  (backs pandas' "calamine" Excel engine, much faster than openpyxl)
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHUNK_ROWS = 100_000
+INGEST_MEMORY_BUDGET_MB = 1024
+ENCODING_SAMPLE_BYTES = 64 * 1024
+ARROW_BLOCK_BYTES = 16 * 1024 * 1024
+# Text that does not decode with the detected encoding is re-read with this one, which accepts any byte
+FALLBACK_ENCODING = 'latin1'
+# pandas' default NA markers, so both CSV readers turn the same cells into nulls
+CSV_NA_VALUES = (
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+)
+# Only extrapolate the final size once this fraction of the file has been read
+EXTRAPOLATE_AFTER_FRACTION = 0.05
+# Parsed xlsx usually takes several times the compressed file size
+XLSX_EXPANSION_FACTOR = 8
+EXCEL_SHEET_WORKERS = 4
+# Rows of several workbook sheets loaded together are tagged with the sheet they came from
+SHEET_COLUMN = "sheet"
+DECOMPRESS_BUFFER_BYTES = 1024 * 1024
+
+# Text formats may also arrive compressed ("june.csv.gz"); columnar formats compress internally
+TEXT_EXTENSIONS = ('csv', 'txt', 'json')
+COLUMNAR_EXTENSIONS = ('parquet', 'feather')
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + ('xlsx',) + COLUMNAR_EXTENSIONS
+COMPRESSION_EXTENSIONS = ('gz', 'bz2', 'zst')
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when a file would not fit in the ingestion memory budget."""
+
+
+def split_extension(name: str):
+    """(format, compression) of a file name: 'june.csv.gz' -> ('csv', 'gz'), 'june.csv' -> ('csv', None)."""
+    parts = name.lower().rsplit('.', 2)
+    if parts[-1] in COMPRESSION_EXTENSIONS and len(parts) > 1:
+        return (parts[-2] if len(parts) == 3 else ''), parts[-1]
+    return (parts[-1] if len(parts) > 1 else ''), None
+
+
+def is_supported(name: str) -> bool:
+    file_ext, compression = split_extension(name)
+    return file_ext in SUPPORTED_EXTENSIONS and (compression is None or file_ext in TEXT_EXTENSIONS)
+
+
+class InMemoryUpload(io.BytesIO):
+    """Enough of Streamlit's UploadedFile (name, size, file_id, file-like reads) to feed load_file."""
+
+    def __init__(self, content: bytes, name: str):
+        super().__init__(content)
+        self.name = name
+        self.size = len(content)
+        self.file_id = f"{name}-{self.size}"
+
+
+class _DecompressingReader(io.RawIOBase):
+    """The decompressed bytes of a compressed upload, produced block by block as they are read.
+
+    Encoding detection and Arrow's schema pass re-read the start of the data, so seeking back is supported
+    by decompressing again from the beginning; seeking forward decompresses and discards.
+    """
+
+    def __init__(self, raw, compression: str):
+        self._raw = raw
+        self._compression = compression
+        self._restart()
+
+    def _restart(self):
+        self._raw.seek(0)
+        self._source = self._raw
+        if self._compression == 'gz':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='rb')
+        elif self._compression == 'bz2':
+            self._stream = bz2.BZ2File(self._raw, mode='rb')
+        elif zstandard is not None:
+            self._stream = zstandard.ZstdDecompressor().stream_reader(self._raw, read_across_frames=True)
+        elif pa is not None:
+            # pyarrow closes Python files it wraps, so it reads the (in-memory) upload's buffer instead
+            data = self._raw.getbuffer() if hasattr(self._raw, 'getbuffer') else self._raw.read()
+            self._source = pa.BufferReader(pa.py_buffer(data))
+            self._stream = pa.CompressedInputStream(self._source, 'zstd')
+        else:
+            raise ValueError("Reading .zst files needs the zstandard or pyarrow package")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._stream.readinto(b)
+        self._position += n
+        return n
+
+    def tell(self):
+        return self._position
+
+    def compressed_tell(self):
+        """How many compressed bytes have been consumed."""
+        return self._source.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only seek relative to the start or the current position")
+        if offset < self._position:
+            self._restart()
+        while self._position < offset and self.read(min(offset - self._position, DECOMPRESS_BUFFER_BYTES)):
+            pass
+        return self._position
+
+
+def detect_encoding(buffer) -> str:
+    """Guess the text encoding from the first bytes of buffer, leaving the position unchanged."""
+    position = buffer.tell()
+    sample = buffer.read(ENCODING_SAMPLE_BYTES)
+    buffer.seek(position)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # Incremental decode tolerates a multi-byte character cut off at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(sample).best()
+        if best is not None:
+            return best.encoding
+    except ImportError:
+        pass
+    return 'latin1'
+
+
+def _arrow_csv_chunks(buffer, encoding, delimiter):
+    read_options = pa_csv.ReadOptions(encoding=encoding, block_size=ARROW_BLOCK_BYTES)
+    parse_options = pa_csv.ParseOptions(delimiter=delimiter)
+
+    # Arrow turns ISO dates into date/timestamp columns; keep them as text like pandas does
+    start = buffer.tell()
+    schema = pa_csv.open_csv(buffer, read_options=read_options, parse_options=parse_options).schema
+    if any(pa.types.is_binary(field.type) for field in schema):
+        # Arrow keeps text that is not valid UTF-8 as bytes
+        raise UnicodeError(f"Text is not valid {encoding}")
+    text_columns = {field.name: pa.string() for field in schema if pa.types.is_temporal(field.type)}
+    buffer.seek(start)
+
+    reader = pa_csv.open_csv(
+        buffer,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=pa_csv.ConvertOptions(
+            column_types=text_columns,
+            null_values=list(CSV_NA_VALUES),
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _pandas_csv_chunks(buffer, encoding, delimiter, chunk_rows):
+    yield from pd.read_csv(buffer, encoding=encoding, delimiter=delimiter, chunksize=chunk_rows, low_memory=False)
+
+
+def _bytes_read(buffer, total_bytes):
+    """read_fraction for _collect: how far through its total_bytes buffer has been read."""
+    return lambda: min(buffer.tell() / total_bytes, 1.0) if total_bytes else 1.0
+
+
+def _collect(chunks, read_fraction, budget_bytes, progress_callback):
+    """Optimize each chunk as it arrives and stop as soon as the budget would be exceeded.
+
+    read_fraction() is the share of the input consumed so far, used to extrapolate the final size.
+    """
+    optimized = []
+    used_bytes = 0
+    for chunk in chunks:
+        chunk = optimize_dtypes(chunk)
+        used_bytes += chunk.memory_usage(deep=True).sum()
+        optimized.append(chunk)
+
+        fraction = read_fraction()
+        projected = used_bytes / fraction if fraction >= EXTRAPOLATE_AFTER_FRACTION else used_bytes
+        if projected > budget_bytes:
+            raise MemoryBudgetExceeded(
+                f"File needs about {projected / 1024**2:,.1f} MB in memory, "
+                f"over the {budget_bytes / 1024**2:,.0f} MB limit."
+            )
+        if progress_callback:
+            progress_callback(fraction, f"Parsed {sum(len(c) for c in optimized):,} rows")
+
+    return concat_chunks(optimized)
+
+
+def _read_delimited(buffer, delimiter, chunk_rows, read_fraction, budget_bytes, progress_callback):
+    encoding = detect_encoding(buffer)
+    try:
+        return _read_delimited_as(buffer, encoding, delimiter, chunk_rows, read_fraction, budget_bytes,
+                                  progress_callback)
+    except UnicodeError as e:
+        # The encoding was guessed from the start of the file only
+        if encoding == FALLBACK_ENCODING:
+            raise
+        logger.info(f"Could not decode as {encoding}, re-reading as {FALLBACK_ENCODING}: {e}")
+        buffer.seek(0)
+        return _read_delimited_as(buffer, FALLBACK_ENCODING, delimiter, chunk_rows, read_fraction, budget_bytes,
+                                  progress_callback)
+
+
+def _read_delimited_as(buffer, encoding, delimiter, chunk_rows, read_fraction, budget_bytes, progress_callback):
+    if pa_csv is not None:
+        try:
+            return _collect(_arrow_csv_chunks(buffer, encoding, delimiter),
+                            read_fraction, budget_bytes, progress_callback)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            if 'invalid UTF8' in str(e):
+                raise UnicodeError(str(e)) from e
+            # Arrow infers types from the first block and rejects later mismatches; pandas is more forgiving
+            logger.info(f"Arrow CSV reader failed, falling back to pandas: {e}")
+            buffer.seek(0)
+    return _collect(_pandas_csv_chunks(buffer, encoding, delimiter, chunk_rows),
+                    read_fraction, budget_bytes, progress_callback)
+
+
+def _read_columnar(file_ext, buffer, columns, chunk_rows, budget_bytes, progress_callback):
+    """Parquet or Feather record batch by record batch, decoding only the requested columns."""
+    if pa is None:
+        raise ValueError(f"Reading .{file_ext} files needs the pyarrow package")
+    if columns is not None:
+        # An unreadable footer gives no names; the reader below then reports the real problem
+        available = set(columnar_schema(buffer))
+        missing = [col for col in columns if col not in available] if available else []
+        if missing:
+            raise ValueError(f"Columns not in file: {', '.join(map(str, missing))}")
+    if file_ext == 'parquet':
+        parquet = pa_parquet.ParquetFile(buffer)
+        batches = parquet.iter_batches(batch_size=chunk_rows, columns=columns)
+        # Progress is counted in rows
+        total, size = parquet.metadata.num_rows, lambda batch: batch.num_rows
+    else:
+        try:
+            reader = pa.ipc.open_file(buffer)
+        except pa.ArrowInvalid:
+            # Feather V1 predates the Arrow IPC file format and can only be read whole
+            buffer.seek(0)
+            reader = pa_feather.read_table(buffer, columns=columns).to_reader(max_chunksize=chunk_rows)
+            return _collect((batch.to_pandas() for batch in reader), lambda: 1.0, budget_bytes, progress_callback)
+        batches = (reader.get_batch(i) if columns is None else reader.get_batch(i).select(columns)
+                   for i in range(reader.num_record_batches))
+        # Progress is counted in record batches
+        total, size = reader.num_record_batches, lambda batch: 1
+    done = [0]
+
+    def chunks():
+        for batch in batches:
+            done[0] += size(batch)
+            yield batch.to_pandas()
+
+    return _collect(chunks(), lambda: min(done[0] / total, 1.0) if total else 1.0, budget_bytes, progress_callback)
+
+
+def _read_excel(buffer, budget_bytes, progress_callback, sheets=None):
+    """The first sheet of a workbook, or the named sheets parsed concurrently and combined with a SHEET_COLUMN tag.
+
+    Empty sheets are skipped; a single non-empty sheet is returned as is.
+    """
+    content = buffer.read()
+    engine = {'engine': EXCEL_ENGINE} if EXCEL_ENGINE else {}
+    available = pd.ExcelFile(io.BytesIO(content), **engine).sheet_names
+    if sheets is None:
+        sheet_names = available[:1]
+    else:
+        missing = [name for name in sheets if name not in available]
+        if missing:
+            raise ValueError(f"Sheets not in workbook: {', '.join(map(str, missing))}")
+        sheet_names = list(sheets)
+
+    def read_sheet(name):
+        # Each sheet gets its own file object, so the readers do not share a position
+        return optimize_dtypes(pd.read_excel(io.BytesIO(content), sheet_name=name, **engine))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(EXCEL_SHEET_WORKERS, len(sheet_names)))) as pool:
+        sheets = [(name, frame) for name, frame in zip(sheet_names, pool.map(read_sheet, sheet_names))
+                  if len(frame.columns)]
+    used_bytes = sum(frame.memory_usage(deep=True).sum() for _, frame in sheets)
+    if used_bytes > budget_bytes:
+        raise MemoryBudgetExceeded(
+            f"Workbook needs about {used_bytes / 1024**2:,.1f} MB in memory, "
+            f"over the {budget_bytes / 1024**2:,.0f} MB limit."
+        )
+    if progress_callback:
+        progress_callback(1.0, f"Parsed {sum(len(frame) for _, frame in sheets):,} rows "
+                               f"from {len(sheets)} sheet{'s' if len(sheets) != 1 else ''}")
+    if not sheets:
+        return pd.DataFrame()
+    if len(sheets) == 1:
+        return sheets[0][1]
+    return align_frames([frame for _, frame in sheets], [name for name, _ in sheets], SHEET_COLUMN)
+
+
+def excel_sheet_names(uploaded_file):
+    """Sheet names of an xlsx upload, in workbook order; [] if they cannot be read."""
+    file_ext, compression = split_extension(uploaded_file.name)
+    if file_ext != 'xlsx' or compression:
+        return []
+    try:
+        uploaded_file.seek(0)
+        return pd.ExcelFile(uploaded_file, **({'engine': EXCEL_ENGINE} if EXCEL_ENGINE else {})).sheet_names
+    except Exception:
+        return []
+    finally:
+        uploaded_file.seek(0)
+
+
+def columnar_schema(uploaded_file):
+    """Column names of a Parquet or Feather upload, read from its footer; [] if they cannot be read."""
+    file_ext, _ = split_extension(uploaded_file.name)
+    if pa is None or file_ext not in COLUMNAR_EXTENSIONS:
+        return []
+    try:
+        uploaded_file.seek(0)
+        if file_ext == 'parquet':
+            return pa_parquet.ParquetFile(uploaded_file).schema_arrow.names
+        try:
+            return pa.ipc.open_file(uploaded_file).schema.names
+        except pa.ArrowInvalid:
+            uploaded_file.seek(0)
+            return pa_feather.read_table(uploaded_file).schema.names
+    except (pa.ArrowException, OSError):
+        return []
+    finally:
+        uploaded_file.seek(0)
+
+
+def load_file(uploaded_file, memory_budget_mb: float = INGEST_MEMORY_BUDGET_MB,
+              chunk_rows: int = INGEST_CHUNK_ROWS, progress_callback=None, columns=None, sheets=None):
+    """Parse an uploaded file chunk by chunk with optimized dtypes.
+
+    CSV, TXT and JSON may be gzip, bzip2 or zstd compressed ("data.csv.gz") and are decompressed as they
+    are parsed. columns limits Parquet and Feather files to those columns; other formats ignore it.
+    sheets names the Excel sheets to load (several are combined with a SHEET_COLUMN tag); by default
+    only the first sheet is read.
+    Returns (DataFrame, None) on success or (None, error message) on failure.
+    progress_callback(fraction, message) is called after each chunk.
+    """
+    try:
+        if uploaded_file.size == 0:
+            return None, "Uploaded file is empty (0 bytes)"
+
+        file_ext, compression = split_extension(uploaded_file.name)
+        total_bytes = uploaded_file.size
+        budget_bytes = memory_budget_mb * 1024**2
+        uploaded_file.seek(0)
+        if compression and file_ext not in TEXT_EXTENSIONS:
+            return None, "Unsupported file format"
+        buffer, read_fraction = uploaded_file, _bytes_read(uploaded_file, total_bytes)
+        if compression:
+            decompressed = _DecompressingReader(uploaded_file, compression)
+            buffer = io.BufferedReader(decompressed, buffer_size=DECOMPRESS_BUFFER_BYTES)
+            # Progress follows the compressed bytes consumed, since the decompressed size is unknown upfront
+            read_fraction = lambda: min(decompressed.compressed_tell() / total_bytes, 1.0)
+
+        if file_ext == 'csv':
+            try:
+                return _read_delimited(buffer, ',', chunk_rows, read_fraction, budget_bytes, progress_callback), None
+            except MemoryBudgetExceeded:
+                raise
+            except Exception as e:
+                return None, f"CSV Error: {str(e)}"
+
+        elif file_ext == 'xlsx':
+            # Excel readers have no chunked mode, so check the estimated size before parsing
+            if total_bytes * XLSX_EXPANSION_FACTOR > budget_bytes:
+                raise MemoryBudgetExceeded(
+                    f"Excel file would need about {total_bytes * XLSX_EXPANSION_FACTOR / 1024**2:,.0f} MB "
+                    f"in memory, over the {memory_budget_mb:,.0f} MB limit."
+                )
+            try:
+                return _read_excel(uploaded_file, budget_bytes, progress_callback, sheets), None
+            except MemoryBudgetExceeded:
+                raise
+            except Exception as e:
+                return None, f"Excel Error: {str(e)}"
+
+        elif file_ext == 'txt':
+            try:
+                return _read_delimited(buffer, '\t', chunk_rows, read_fraction, budget_bytes, progress_callback), None
+            except MemoryBudgetExceeded:
+                raise
+            except Exception as e:
+                return None, f"Text File Error: {str(e)}"
+
+        elif file_ext == 'json':
+            try:
+                reader = pd.read_json(buffer, lines=True, chunksize=chunk_rows)
+                return _collect(reader, read_fraction, budget_bytes, progress_callback), None
+            except MemoryBudgetExceeded:
+                raise
+            except Exception as e:
+                return None, f"JSON Error: {str(e)}"
+
+        elif file_ext in COLUMNAR_EXTENSIONS:
+            try:
+                return _read_columnar(file_ext, uploaded_file, columns, chunk_rows, budget_bytes,
+                                      progress_callback), None
+            except MemoryBudgetExceeded:
+                raise
+            except Exception as e:
+                return None, f"{file_ext.capitalize()} Error: {str(e)}"
+
+        return None, "Unsupported file format"
+
+    except MemoryBudgetExceeded as e:
+        return None, f"Memory limit exceeded: {str(e)}"
+    except Exception as e:
+        return None, f"Unexpected error: {str(e)}"
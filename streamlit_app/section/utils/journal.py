@@ -0,0 +1,213 @@
+from typing import NamedTuple, Optional
+import pandas as pd
+import streamlit as st
+from section.utils.helper import compute_cell_diff
+
+# Oldest entries are forgotten beyond this many
+JOURNAL_MAX_ENTRIES = 100
+
+_SESSION_KEY = "edit_journal"
+
+
+class Delta(NamedTuple):
+    """The difference between two versions of a frame, holding only what changed.
+
+    Cell edits keep the changed cells; dtype changes, dropped and added columns keep those columns; row
+    insertions and deletions keep those rows. Indexes are only kept when the set or order of rows changed.
+    """
+    label: str
+    before_columns: pd.Index
+    after_columns: pd.Index
+    cells: dict            # column -> (old values, new values) of the changed cells, indexed by row label
+    replaced: dict         # column -> (old column, new column) where the dtype changed
+    dropped: dict          # column -> old column
+    added: dict            # column -> new column (rows kept from before)
+    removed_rows: pd.DataFrame
+    added_rows: pd.DataFrame
+    before_index: Optional[pd.Index]
+    after_index: Optional[pd.Index]
+
+    @property
+    def changed_cells(self) -> int:
+        return sum(len(new) for _, new in self.cells.values())
+
+    @property
+    def schema_changed(self) -> bool:
+        return bool(self.replaced or self.dropped or self.added) or not self.before_columns.equals(self.after_columns)
+
+    @property
+    def touched_rows(self) -> pd.Index:
+        """Labels of rows whose values differ between the two versions (rows present in either)."""
+        labels = [self.removed_rows.index, self.added_rows.index] + [new.index for _, new in self.cells.values()]
+        return labels[0].append(labels[1:]).unique()
+
+    @property
+    def nbytes(self) -> int:
+        parts = [self.removed_rows, self.added_rows]
+        parts += [s for pair in list(self.cells.values()) + list(self.replaced.values()) for s in pair]
+        parts += list(self.dropped.values()) + list(self.added.values())
+        return int(sum(part.memory_usage(deep=True, index=True).sum() if isinstance(part, pd.DataFrame)
+                       else part.memory_usage(deep=True, index=True) for part in parts))
+
+    def is_empty(self) -> bool:
+        return (not self.schema_changed and not self.cells and self.removed_rows.empty and self.added_rows.empty
+                and (self.before_index is None or self.before_index.equals(self.after_index)))
+
+    def inverse(self) -> "Delta":
+        return Delta(
+            f"Undo {self.label}", self.after_columns, self.before_columns,
+            {col: (new, old) for col, (old, new) in self.cells.items()},
+            {col: (new, old) for col, (old, new) in self.replaced.items()},
+            self.added, self.dropped, self.added_rows, self.removed_rows,
+            self.after_index, self.before_index,
+        )
+
+
+def compute_delta(before: pd.DataFrame, after: pd.DataFrame, label: str, rows: Optional[pd.Index] = None) -> Delta:
+    """Describe how after differs from before, matching rows by index label.
+
+    rows, when the caller knows them, are the only labels whose values may differ; cells elsewhere are not compared.
+    """
+    if not (before.index.is_unique and after.index.is_unique):
+        # Rows cannot be matched: record the change as all rows replaced (still shared under Copy-on-Write)
+        return Delta(label, before.columns, after.columns, {}, {}, {}, {}, before, after, before.index, after.index)
+
+    same_rows = before.index.equals(after.index)
+    if same_rows:
+        shared = after.index
+        removed_rows, added_rows = before.iloc[:0], after.iloc[:0]
+        before_index = after_index = None
+    else:
+        added_mask = ~after.index.isin(before.index)
+        removed_rows = before[~before.index.isin(after.index)]
+        added_rows = after[added_mask]
+        shared = after.index[~added_mask]
+        before_index, after_index = before.index, after.index
+    compared = shared if rows is None else rows[shared.get_indexer(rows) >= 0].unique()
+
+    cells, replaced = {}, {}
+    for col in after.columns.intersection(before.columns, sort=False):
+        old, new = before[col], after[col]
+        if old.dtype != new.dtype:
+            replaced[col] = (old, new)
+            continue
+        if not same_rows or rows is not None:
+            old, new = old.loc[compared], new.loc[compared]
+        edited = compute_cell_diff(new.to_frame(), old.to_frame(), []).edited[:, 0]
+        if edited.any():
+            cells[col] = (old[edited], new[edited])
+
+    return Delta(
+        label, before.columns, after.columns, cells, replaced,
+        {col: before[col] for col in before.columns.difference(after.columns, sort=False)},
+        {col: after[col].loc[shared] for col in after.columns.difference(before.columns, sort=False)},
+        removed_rows, added_rows, before_index, after_index,
+    )
+
+
+def apply_delta(frame: pd.DataFrame, delta: Delta) -> pd.DataFrame:
+    """Turn the before version into the after version; only the columns the delta touches are copied."""
+    frame = frame.copy(deep=False)
+    if not delta.removed_rows.empty:
+        frame = frame.drop(index=delta.removed_rows.index)
+    if delta.dropped:
+        frame = frame.drop(columns=list(delta.dropped))
+    # Whole columns are assigned by label, so rows still to be added or already removed are ignored
+    for col, (_, new) in delta.replaced.items():
+        frame[col] = new
+    for col, (_, new) in delta.cells.items():
+        frame.loc[new.index, col] = new.to_numpy()
+    for col, new in delta.added.items():
+        frame[col] = new
+    if not delta.added_rows.empty:
+        frame = pd.concat([frame, delta.added_rows])
+    frame = frame[delta.after_columns]
+    if delta.after_index is not None:
+        frame = frame.loc[delta.after_index]
+    return frame
+
+
+class PendingChanges(NamedTuple):
+    """What the database is missing: labels of rows that may differ, or schema_changed for a full rewrite."""
+    rows: pd.Index
+    schema_changed: bool
+
+
+class EditJournal:
+    """Undo/redo history of a session's data as a list of deltas with a cursor.
+
+    saved marks the position the database last matched, so pending_changes() can tell a save which rows to
+    send; it is None until the first save and when that position is no longer in the journal.
+    """
+
+    def __init__(self, max_entries: int = JOURNAL_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.reset()
+
+    def reset(self):
+        self.entries = []
+        self.cursor = 0
+        self.saved = None
+
+    def record(self, before: pd.DataFrame, after: pd.DataFrame, label: str,
+               rows: Optional[pd.Index] = None) -> Optional[Delta]:
+        """Add the change from before to after, dropping any redo history; returns None if nothing changed."""
+        delta = compute_delta(before, after, label, rows)
+        if delta.is_empty():
+            return None
+        del self.entries[self.cursor:]
+        if self.saved is not None and self.saved > self.cursor:
+            self.saved = None
+        self.entries.append(delta)
+        self.cursor += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.pop(0)
+            self.cursor -= 1
+            self.saved = self.saved - 1 if self.saved else None
+        return delta
+
+    def can_undo(self) -> bool:
+        return self.cursor > 0
+
+    def can_redo(self) -> bool:
+        return self.cursor < len(self.entries)
+
+    def undo(self, frame: pd.DataFrame) -> pd.DataFrame:
+        self.cursor -= 1
+        return apply_delta(frame, self.entries[self.cursor].inverse())
+
+    def redo(self, frame: pd.DataFrame) -> pd.DataFrame:
+        self.cursor += 1
+        return apply_delta(frame, self.entries[self.cursor - 1])
+
+    def replay(self, base: pd.DataFrame, upto: Optional[int] = None) -> pd.DataFrame:
+        """Rebuild the version at position upto (default: the cursor) from the first version."""
+        frame = base
+        for delta in self.entries[:self.cursor if upto is None else upto]:
+            frame = apply_delta(frame, delta)
+        return frame
+
+    def pending_changes(self) -> Optional[PendingChanges]:
+        """Rows touched between the saved position and the cursor, in either direction; None if unknown."""
+        if self.saved is None:
+            return None
+        deltas = self.entries[min(self.saved, self.cursor):max(self.saved, self.cursor)]
+        if not deltas:
+            return PendingChanges(pd.Index([]), False)
+        rows = deltas[0].touched_rows.append([d.touched_rows for d in deltas[1:]]).unique()
+        return PendingChanges(rows, any(d.schema_changed for d in deltas))
+
+    def mark_saved(self):
+        self.saved = self.cursor
+
+    def nbytes(self) -> int:
+        return sum(delta.nbytes for delta in self.entries)
+
+
+def session_journal() -> EditJournal:
+    """The edit journal of the current Streamlit session, created on first use."""
+    journal = st.session_state.get(_SESSION_KEY)
+    if journal is None:
+        journal = EditJournal()
+        st.session_state[_SESSION_KEY] = journal
+    return journal
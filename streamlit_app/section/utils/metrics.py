@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+from sqlalchemy import event
+
+# Most recent samples kept per kind; older ones fall off the ring buffer
+METRICS_HISTORY = 5_000
+# Statement text is truncated in samples so the buffer stays small
+STATEMENT_PREVIEW_CHARS = 200
+
+# Prometheus histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class CheckoutSample(NamedTuple):
+    engine: str
+    at: float
+    wait_s: float
+    checked_out: Optional[int]
+    capacity: Optional[int]
+
+
+class StatementSample(NamedTuple):
+    engine: str
+    at: float
+    elapsed_s: float
+    rowcount: Optional[int]
+    executemany: bool
+    statement: str
+    error: Optional[str] = None
+
+
+# Row counts at or above this are driver sentinels for "unknown", not real counts
+_UNKNOWN_ROWCOUNT = 2**63 - 1
+
+_checkouts = deque(maxlen=METRICS_HISTORY)
+_statements = deque(maxlen=METRICS_HISTORY)
+# (engine name, event) -> count, for pool connects, invalidations (failed pre-pings), statement errors and rows
+_counters = {}
+# (metric, engine name) -> [count per bucket..., sum, count] since process start, for the export
+_histograms = {}
+_engines = {}
+_lock = threading.Lock()
+
+
+def _count(name, kind, amount=1):
+    with _lock:
+        _counters[(name, kind)] = _counters.get((name, kind), 0) + amount
+
+
+def _observe(metric, name, value):
+    """Add value to a cumulative histogram; caller holds _lock."""
+    histogram = _histograms.setdefault((metric, name), [0] * (len(LATENCY_BUCKETS) + 2))
+    for i, bucket in enumerate(LATENCY_BUCKETS):
+        if value <= bucket:
+            histogram[i] += 1
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def pool_capacity(pool):
+    """(checked out, size + max overflow) for QueuePool-like pools; None where the pool does not report it."""
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else None
+    if hasattr(pool, "size") and hasattr(pool, "_max_overflow"):
+        overflow = pool._max_overflow
+        # A negative max_overflow means unlimited
+        return checked_out, pool.size() + overflow if overflow >= 0 else None
+    return checked_out, None
+
+
+def _time_pool_connect(name, engine):
+    """Wrap engine.raw_connection so the time spent waiting for a connection (including pre-ping) is recorded.
+
+    Every Connection gets its DBAPI connection through raw_connection, which reads engine.pool on each call,
+    so the timing keeps working after dispose() or recreate() replaces the pool. Pool events cannot time
+    this: there is no event before a checkout starts waiting.
+    """
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = time.perf_counter()
+        connection = raw_connection()
+        wait_s = time.perf_counter() - start
+        checked_out, capacity = pool_capacity(engine.pool)
+        with _lock:
+            _checkouts.append(CheckoutSample(name, time.time(), wait_s, checked_out, capacity))
+            _observe("db_pool_checkout_seconds", name, wait_s)
+        return connection
+
+    engine.raw_connection = timed_raw_connection
+
+
+def instrument_engine(engine, name: str):
+    """Record pool checkouts and statement timings for engine under name; repeated calls are no-ops."""
+    with _lock:
+        if _engines.get(name) is engine:
+            return
+        _engines[name] = engine
+
+    _time_pool_connect(name, engine)
+
+    @event.listens_for(engine.pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _count(name, "connects")
+
+    @event.listens_for(engine.pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        _count(name, "invalidations")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_s = time.perf_counter() - conn.info["query_start"].pop()
+        rowcount = cursor.rowcount
+        # Streamed (unbuffered) results have no count yet: pymysql reports 2**64 - 1 until they are read
+        if (rowcount is None or rowcount < 0 or rowcount >= _UNKNOWN_ROWCOUNT
+                or (context is not None and context.execution_options.get("stream_results"))):
+            rowcount = None
+        sample = StatementSample(name, time.time(), elapsed_s, rowcount, executemany,
+                                 " ".join(statement.split())[:STATEMENT_PREVIEW_CHARS])
+        with _lock:
+            _statements.append(sample)
+            _observe("db_statement_seconds", name, elapsed_s)
+        if rowcount:
+            _count(name, "rows", rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        elapsed_s = time.perf_counter() - starts.pop() if starts else 0.0
+        sample = StatementSample(name, time.time(), elapsed_s, None, False,
+                                 " ".join((context.statement or "").split())[:STATEMENT_PREVIEW_CHARS],
+                                 type(context.original_exception).__name__)
+        _count(name, "errors")
+        with _lock:
+            _statements.append(sample)
+
+
+def checkout_samples():
+    with _lock:
+        return list(_checkouts)
+
+
+def statement_samples():
+    with _lock:
+        return list(_statements)
+
+
+def counters() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def pool_status() -> dict:
+    """Engine name -> (checked out, capacity) right now."""
+    with _lock:
+        engines = dict(_engines)
+    return {name: pool_capacity(engine.pool) for name, engine in engines.items()}
+
+
+def reset():
+    """Clear the sample buffers; exported totals keep counting so they stay monotonic."""
+    with _lock:
+        _checkouts.clear()
+        _statements.clear()
+
+
+def _histogram_lines(metric):
+    with _lock:
+        histograms = {name: list(values) for (m, name), values in _histograms.items() if m == metric}
+    lines = []
+    for name, values in sorted(histograms.items()):
+        for bucket, count in zip(LATENCY_BUCKETS, values):
+            lines.append(f'{metric}_bucket{{engine="{name}",le="{bucket}"}} {count}')
+        lines.append(f'{metric}_bucket{{engine="{name}",le="+Inf"}} {values[-1]}')
+        lines.append(f'{metric}_sum{{engine="{name}"}} {values[-2]}')
+        lines.append(f'{metric}_count{{engine="{name}"}} {values[-1]}')
+    return lines
+
+
+def to_prometheus() -> str:
+    """Totals since process start in the Prometheus text exposition format."""
+    events = counters()
+    lines = [
+        "# HELP db_pool_checkout_seconds Time spent waiting for a pooled connection.",
+        "# TYPE db_pool_checkout_seconds histogram",
+    ] + _histogram_lines("db_pool_checkout_seconds")
+
+    lines += [
+        "# HELP db_statement_seconds Statement execution time.",
+        "# TYPE db_statement_seconds histogram",
+    ] + _histogram_lines("db_statement_seconds")
+
+    lines += [
+        "# HELP db_statement_rows_total Rows reported by the driver for executed statements.",
+        "# TYPE db_statement_rows_total counter",
+    ]
+    for (name, kind), count in sorted(events.items()):
+        if kind == "rows":
+            lines.append(f'db_statement_rows_total{{engine="{name}"}} {count}')
+
+    lines += [
+        "# HELP db_pool_events_total Pool connects, invalidations and statement errors.",
+        "# TYPE db_pool_events_total counter",
+    ]
+    for (name, kind), count in sorted(events.items()):
+        if kind != "rows":
+            lines.append(f'db_pool_events_total{{engine="{name}",event="{kind}"}} {count}')
+
+    lines += [
+        "# HELP db_pool_checked_out Connections currently checked out of the pool.",
+        "# TYPE db_pool_checked_out gauge",
+    ]
+    capacities = []
+    for name, (checked_out, capacity) in sorted(pool_status().items()):
+        if checked_out is not None:
+            lines.append(f'db_pool_checked_out{{engine="{name}"}} {checked_out}')
+        if capacity is not None:
+            capacities.append(f'db_pool_capacity{{engine="{name}"}} {capacity}')
+    if capacities:
+        lines += [
+            "# HELP db_pool_capacity Pool size plus max overflow.",
+            "# TYPE db_pool_capacity gauge",
+        ] + capacities
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,192 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+# Object/string columns with fewer distinct values than this fraction of rows become categoricals
+CATEGORY_RATIO = 0.5
+
+# Target for columns whose sources disagree on kind; stored as pandas' default text dtype ('str' from pandas 3)
+_TEXT = 'text'
+_DEFAULT_TEXT_DTYPE = pd.Series([""]).dtype
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == 'object' or isinstance(series.dtype, pd.StringDtype)
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Return df with low-cardinality text as category and int64/float64 downcast where lossless.
+
+    Unchanged columns are shared with df rather than copied.
+    """
+    optimized = df.copy(deep=False)
+    for i in range(optimized.shape[1]):
+        series = optimized.iloc[:, i]
+        if _is_text(series):
+            if series.nunique() < CATEGORY_RATIO * len(series):
+                try:
+                    optimized.isetitem(i, series.astype('category'))
+                except (TypeError, ValueError):
+                    pass
+        elif series.dtype in ['int64', 'float64']:
+            try:
+                optimized.isetitem(i, pd.to_numeric(series, downcast='integer'))
+            except (TypeError, ValueError):
+                try:
+                    optimized.isetitem(i, pd.to_numeric(series, downcast='float'))
+                except (TypeError, ValueError):
+                    pass
+    return optimized
+
+
+def concat_chunks(chunks) -> pd.DataFrame:
+    """Concatenate optimized chunks, keeping categoricals categorical by unifying their categories.
+
+    Chunks are optimized separately, so a column can be numeric in one and text in another; such columns
+    are reconciled like align_frames does (all text, re-optimized) instead of becoming mixed object columns.
+    """
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+
+    chunks = [chunk.copy(deep=False) for chunk in chunks]
+    columns = list(dict.fromkeys(col for chunk in chunks for col in chunk.columns))
+    text_columns = []
+    for col in columns:
+        target = _common_dtype([chunk[col].dtype for chunk in chunks if col in chunk.columns])
+        if target == _TEXT:
+            text_columns.append(col)
+        for chunk in chunks:
+            if col not in chunk.columns:
+                continue
+            if target == _TEXT:
+                chunk[col] = _to_text(chunk[col])
+            elif target != 'category' and chunk[col].dtype != target:
+                chunk[col] = chunk[col].astype(target)
+
+    for col in columns:
+        if all(col in chunk.columns and isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks):
+            categories = functools.reduce(
+                lambda left, right: left.union(right),
+                (chunk[col].cat.categories for chunk in chunks),
+            )
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+
+    combined = pd.concat(chunks, ignore_index=True)
+    if text_columns:
+        # Low-cardinality text becomes categorical again
+        optimized = optimize_dtypes(combined[text_columns])
+        for col in text_columns:
+            combined[col] = optimized[col]
+    return combined
+
+
+def _common_dtype(dtypes):
+    """The dtype every frame's version of a column can be converted to without losing values."""
+    first = dtypes[0]
+    if all(dtype == first for dtype in dtypes):
+        return first
+    if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+        return 'category'  # categories are unified when concatenating
+    if all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+        # Nullable extension types are compared by their NumPy equivalent
+        return np.result_type(*[getattr(dtype, 'numpy_dtype', dtype) for dtype in dtypes])
+    if all(pd.api.types.is_datetime64_any_dtype(dtype) for dtype in dtypes):
+        return 'datetime64[ns]'
+    # Mixed kinds (e.g. account numbers read as numbers in one file and text in another) become text
+    return _TEXT
+
+
+def _to_text(series: pd.Series) -> pd.Series:
+    """series as strings, writing whole numbers stored as floats (because of nulls) without a decimal part."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    elif pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        series = series.astype('Int64')
+    return series.astype(pd.StringDtype()).astype(_DEFAULT_TEXT_DTYPE)
+
+
+def align_frames(frames, source_names, source_column: str) -> pd.DataFrame:
+    """Concatenate frames over the union of their columns with reconciled dtypes, tagging rows with their source.
+
+    Columns missing from a frame are null there. If the data already has source_column, underscores are
+    appended to the tag column's name until it is unique.
+    """
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    while source_column in columns:
+        source_column += '_'
+    targets = {}
+    for col in columns:
+        dtypes = [frame[col].dtype for frame in frames if col in frame.columns]
+        target = _common_dtype(dtypes)
+        if len(dtypes) < len(frames) and isinstance(target, np.dtype) and target.kind in 'biu':
+            # NumPy integers and booleans cannot hold the nulls of frames without the column; widen like pd.concat
+            target = np.dtype('float64') if target.kind in 'iu' else np.dtype(object)
+        targets[col] = target
+
+    aligned = []
+    for frame, name in zip(frames, source_names):
+        frame = frame.copy(deep=False)
+        for col in columns:
+            target = targets[col]
+            if col not in frame.columns:
+                frame[col] = pd.Series(np.nan, index=frame.index, dtype=object)
+            if target == _TEXT:
+                frame[col] = _to_text(frame[col])
+            elif target != 'category' and frame[col].dtype != target:
+                frame[col] = frame[col].astype(target)
+        frame[source_column] = pd.Categorical([name] * len(frame), categories=list(dict.fromkeys(source_names)))
+        aligned.append(frame[columns + [source_column]])
+    # Columns that ended up as text are re-optimized (low-cardinality text becomes categorical again)
+    return optimize_dtypes(concat_chunks(aligned))
+
+
+class OptimizationResult(NamedTuple):
+    frame: pd.DataFrame
+    original_mb: float
+    optimized_mb: float
+
+
+# Results shared across sessions, keyed by content hash (same file in another tab is free)
+OPTIMIZE_CACHE_SIZE = 8
+_optimize_cache = OrderedDict()
+_optimize_lock = threading.Lock()
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Hash of the values, column names and dtypes of df."""
+    digest = hashlib.sha1()
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def optimize_cached(df: pd.DataFrame, fingerprint: Optional[str] = None) -> OptimizationResult:
+    """optimize_dtypes plus memory statistics, reusing earlier results for identical content."""
+    fingerprint = fingerprint or content_hash(df)
+    with _optimize_lock:
+        if fingerprint in _optimize_cache:
+            _optimize_cache.move_to_end(fingerprint)
+            return _optimize_cache[fingerprint]
+
+    original_mb = df.memory_usage(deep=True).sum() / (1024**2)
+    optimized = optimize_dtypes(df)
+    result = OptimizationResult(optimized, original_mb, optimized.memory_usage(deep=True).sum() / (1024**2))
+    remember_optimization(fingerprint, result)
+    return result
+
+
+def remember_optimization(fingerprint: str, result: OptimizationResult):
+    """Add a result computed elsewhere (e.g. reloaded from disk) to the shared cache."""
+    with _optimize_lock:
+        _optimize_cache[fingerprint] = result
+        _optimize_cache.move_to_end(fingerprint)
+        while len(_optimize_cache) > OPTIMIZE_CACHE_SIZE:
+            _optimize_cache.popitem(last=False)
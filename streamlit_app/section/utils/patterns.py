@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# Content detection looks at a bounded sample so wide/tall frames cost the same
+DETECT_SAMPLE_ROWS = 1_000
+DETECT_MIN_MATCH = 0.9
+# Account numbers must also look like identifiers, not repeated codes
+ACCOUNT_MIN_DISTINCT_RATIO = 0.5
+
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}"
+IBAN_PATTERN = r"[A-Z]{2}[0-9]{2}[A-Z0-9]{11,30}"
+CARD_PATTERN = r"[0-9]{13,19}"
+ACCOUNT_PATTERN = r"[0-9]{8,18}"
+
+
+def _char_matrix(values: pd.Series) -> np.ndarray:
+    """Left-aligned 2D array of the ASCII codes of values (which must be ASCII), zero-padded on the right.
+
+    Built by NumPy's fixed-width bytes conversion, without joining millions of Python strings.
+    """
+    width = int(values.str.len().max())
+    return values.to_numpy(dtype=object).astype(f'S{width}').view(np.uint8).reshape(len(values), width)
+
+
+def luhn_valid(values: pd.Series) -> np.ndarray:
+    """Vectorized Luhn check; values must be digit-only strings (others should be masked out first)."""
+    values = values.astype(str)
+    result = np.zeros(len(values), dtype=bool)
+    ok = values.str.fullmatch(r"[0-9]+").fillna(False).to_numpy(dtype=bool)
+    if not ok.any():
+        return result
+
+    chars = _char_matrix(values[ok])
+    lengths = (chars != 0).sum(axis=1)
+    digits = np.where(chars != 0, chars.astype(np.int16) - 48, 0)
+    # Double every second digit counting from the right (the check digit is not doubled)
+    from_right = lengths[:, None] - 1 - np.arange(chars.shape[1])
+    doubled = np.where(digits > 4, digits * 2 - 9, digits * 2)
+    digits = np.where(from_right % 2 == 1, doubled, digits)
+    result[ok] = digits.sum(axis=1) % 10 == 0
+    return result
+
+
+def iban_valid(values: pd.Series) -> np.ndarray:
+    """Vectorized ISO 13616 mod-97 check on upper-cased, space-free IBAN strings."""
+    values = values.astype(str).str.replace(" ", "", regex=False).str.upper()
+    result = np.zeros(len(values), dtype=bool)
+    ok = values.str.fullmatch(IBAN_PATTERN).fillna(False).to_numpy(dtype=bool)
+    if not ok.any():
+        return result
+
+    # Move country code and check digits to the end, then fold character by character
+    rearranged = values[ok].str[4:] + values[ok].str[:4]
+    chars = _char_matrix(rearranged)
+
+    remainder = np.zeros(len(rearranged), dtype=np.int64)
+    for j in range(chars.shape[1]):
+        column = chars[:, j]
+        is_digit = (column >= 48) & (column <= 57)
+        is_letter = (column >= 65) & (column <= 90)
+        # Letters expand to two digits (A=10 ... Z=35); padding is skipped
+        remainder = np.where(is_digit, (remainder * 10 + (column - 48)) % 97, remainder)
+        remainder = np.where(is_letter, (remainder * 100 + (column - 55)) % 97, remainder)
+    result[ok] = remainder == 1
+    return result
+
+
+def _match_rate(values: pd.Series, pattern: str) -> float:
+    return float(values.str.fullmatch(pattern).fillna(False).mean())
+
+
+def detect_value_kind(values: pd.Series, min_match: float = DETECT_MIN_MATCH):
+    """Classify a column sample as 'email', 'iban', 'card_number' or 'account_number', or None."""
+    values = values.dropna()
+    if values.empty:
+        return None
+    if pd.api.types.is_float_dtype(values):
+        return None
+    values = values.astype(str).str.strip()
+    compact = values.str.replace(r"[\s-]", "", regex=True)
+
+    if _match_rate(values, EMAIL_PATTERN) >= min_match:
+        return 'email'
+    if iban_valid(compact).mean() >= min_match:
+        return 'iban'
+    if _match_rate(compact, CARD_PATTERN) >= min_match and luhn_valid(compact).mean() >= min_match:
+        return 'card_number'
+    if (_match_rate(compact, ACCOUNT_PATTERN) >= min_match
+            and compact.nunique() >= ACCOUNT_MIN_DISTINCT_RATIO * len(compact)):
+        return 'account_number'
+    return None
+
+
+def detect_sensitive_columns(df: pd.DataFrame, sample_rows: int = DETECT_SAMPLE_ROWS,
+                             min_match: float = DETECT_MIN_MATCH) -> dict:
+    """Map column name -> detected kind for columns whose sampled values look like banking identifiers."""
+    if df.empty:
+        return {}
+    sample = df.sample(n=sample_rows, random_state=0) if len(df) > sample_rows else df
+
+    detected = {}
+    for col in sample.columns:
+        series = sample[col]
+        # Only text and integer columns can hold identifiers
+        if not (series.dtype == 'object' or isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype))
+                or pd.api.types.is_integer_dtype(series)):
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        kind = detect_value_kind(series, min_match)
+        if kind:
+            detected[col] = kind
+    return detected
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Frames wider than this are profiled on a thread pool, one group of columns per worker
+PARALLEL_MIN_COLUMNS = 32
+PROFILE_WORKERS = 4
+
+PROFILE_COLUMNS = ['dtype', 'numeric', 'distinct', 'nulls', 'min', 'max', 'mean', 'std', 'sample']
+
+
+def _is_summary_numeric(series: pd.Series) -> bool:
+    """Columns that DataFrame.describe() summarizes by default."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _profile_column(series: pd.Series):
+    nulls = int(series.isna().sum())
+    numeric = _is_summary_numeric(series)
+    row = {
+        'dtype': str(series.dtype),
+        'numeric': numeric,
+        'distinct': int(series.nunique()),
+        'nulls': nulls,
+        'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan,
+        'sample': series.iloc[0] if len(series) else None,
+    }
+    if numeric and nulls < len(series):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        row.update(
+            min=np.nanmin(values),
+            max=np.nanmax(values),
+            mean=np.nanmean(values),
+            std=np.nanstd(values, ddof=1) if len(values) - nulls > 1 else np.nan,
+        )
+    return row
+
+
+def _profile_group(df: pd.DataFrame, positions):
+    return [_profile_column(df.iloc[:, i]) for i in positions]
+
+
+def profile_columns(df: pd.DataFrame, workers: int = PROFILE_WORKERS) -> pd.DataFrame:
+    """Compute dtype, distinct/null counts, numeric min/max/mean/std and a sample value for every column.
+
+    Returns one row per column, indexed by column name.
+    """
+    positions = range(df.shape[1])
+    if df.shape[1] >= PARALLEL_MIN_COLUMNS and workers > 1:
+        groups = [positions[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda group: _profile_group(df, group), groups))
+        # Undo the round-robin split so rows follow the column order
+        rows = [None] * df.shape[1]
+        for group, group_rows in zip(groups, results):
+            for position, row in zip(group, group_rows):
+                rows[position] = row
+    else:
+        rows = _profile_group(df, positions)
+
+    return pd.DataFrame(rows, index=df.columns, columns=PROFILE_COLUMNS)
+
+
+def numeric_summary(profile: pd.DataFrame) -> pd.DataFrame:
+    """The mean/std/min/max view of numeric columns, as df.describe() would show it."""
+    return profile.loc[profile['numeric'].astype(bool), ['mean', 'std', 'min', 'max']].astype('float64')
@@ -0,0 +1,91 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_TTL_S = 300
+QUERY_CACHE_MAX_MB = 256
+
+# Whitespace outside string literals is collapsed so reformatted queries share an entry
+_WHITESPACE_RE = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\")|\s+")
+_NAME = r"(?:[`\"\[]?\w+[`\"\]]?\.)?[`\"\[]?\w+[`\"\]]?"
+_TABLE_RE = re.compile(
+    rf"\b(?:join|into|update|table(?:\s+if(?:\s+not)?\s+exists)?)\s+({_NAME})", re.IGNORECASE
+)
+# FROM may list several tables: FROM a x, b AS y
+_FROM_RE = re.compile(rf"\bfrom\s+({_NAME}(?:\s+(?:as\s+)?\w+)?(?:\s*,\s*{_NAME}(?:\s+(?:as\s+)?\w+)?)*)", re.IGNORECASE)
+
+# key -> (result, tables, expires_at, nbytes), least recently used first
+_entries = OrderedDict()
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def normalize_sql(query: str) -> str:
+    return _WHITESPACE_RE.sub(lambda m: m.group(1) or " ", query).strip().rstrip(";").strip()
+
+
+def referenced_tables(query: str) -> frozenset:
+    """Lower-case, unqualified names of the tables a statement reads or writes."""
+    names = list(_TABLE_RE.findall(query))
+    for table_list in _FROM_RE.findall(query):
+        names.extend(item.split()[0] for item in table_list.split(","))
+    return frozenset(name.split(".")[-1].strip('`"[]').lower() for name in names)
+
+
+def _result_bytes(result) -> int:
+    return int(result.frame.memory_usage(deep=True).sum()) if result.frame is not None else 0
+
+
+def _evict(key):
+    global _total_bytes
+    _, _, _, nbytes = _entries.pop(key)
+    _total_bytes -= nbytes
+
+
+def get(query: str, row_cap):
+    """Return the cached result for query, or None if it is missing or expired."""
+    key = (normalize_sql(query), row_cap)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            _evict(key)
+            return None
+        _entries.move_to_end(key)
+        return entry[0]
+
+
+def put(query: str, row_cap, result, ttl_s: float = QUERY_CACHE_TTL_S):
+    global _total_bytes
+    key = (normalize_sql(query), row_cap)
+    nbytes = _result_bytes(result)
+    max_bytes = QUERY_CACHE_MAX_MB * 1024**2
+    if nbytes > max_bytes:
+        return
+    with _lock:
+        if key in _entries:
+            _evict(key)
+        _entries[key] = (result, referenced_tables(query), time.monotonic() + ttl_s, nbytes)
+        _total_bytes += nbytes
+        while _total_bytes > max_bytes:
+            _evict(next(iter(_entries)))
+
+
+def invalidate_tables(tables=None):
+    """Drop entries that read any of tables (names are matched unqualified, case-insensitively); None drops all."""
+    with _lock:
+        if tables is None:
+            for key in list(_entries):
+                _evict(key)
+            return
+        names = {t.lower() for t in tables}
+        for key, entry in list(_entries.items()):
+            if entry[1] & names:
+                _evict(key)
+
+
+def stats() -> dict:
+    with _lock:
+        return {"entries": len(_entries), "mb": _total_bytes / 1024**2}
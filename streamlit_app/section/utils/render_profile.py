@@ -0,0 +1,136 @@
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from typing import NamedTuple
+import pandas as pd
+import streamlit as st
+
+# Reruns kept per session
+RENDER_HISTORY = 50
+# A profiled rerun that never finished (an exception, st.stop()) stops keeping memory tracing on after this long
+TRACING_RUN_TIMEOUT_S = 300
+
+_HISTORY_KEY = "render_profile_history"
+_CURRENT_KEY = "render_profile_current"
+
+# tracemalloc is process-wide: it runs while any session has a profiled rerun in progress (token -> start time)
+_tracing_runs = {}
+_tracing_lock = threading.Lock()
+_started_tracing = False
+
+
+class SectionTiming(NamedTuple):
+    rerun: int
+    section: str
+    elapsed_s: float
+    # Net change in traced Python/NumPy allocations, and the high-water mark above the section's start. Both are
+    # process-wide: allocations by other sessions' reruns running at the same time are included.
+    memory_delta_mb: float
+    peak_mb: float
+
+
+def _close_section(current):
+    name, started, start_bytes = current["open"]
+    now = time.perf_counter()
+    traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (start_bytes, start_bytes)
+    current["timings"].append(SectionTiming(
+        current["rerun"], name, now - started, (traced - start_bytes) / 1024**2, max(peak - start_bytes, 0) / 1024**2,
+    ))
+
+
+def _update_tracing(add=None, remove=None):
+    """Register or end a profiled rerun, starting tracemalloc for the first and stopping it after the last.
+
+    Runs older than TRACING_RUN_TIMEOUT_S are dropped too, so an abandoned run cannot keep tracing on. Tracing
+    started outside this module is never stopped here.
+    """
+    global _started_tracing
+    with _tracing_lock:
+        now = time.monotonic()
+        _tracing_runs.pop(remove, None)
+        for token, started in list(_tracing_runs.items()):
+            if now - started > TRACING_RUN_TIMEOUT_S:
+                del _tracing_runs[token]
+        if add is not None:
+            _tracing_runs[add] = now
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+        elif not _tracing_runs and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def start_rerun(enabled: bool):
+    """Begin profiling this rerun when enabled; memory is traced only while some session's profiled rerun runs."""
+    finish_rerun()  # a rerun cut short by st.rerun() never reached finish_rerun
+    if not enabled:
+        _update_tracing()
+        return
+    token = uuid.uuid4().hex
+    _update_tracing(add=token)
+    history = st.session_state.setdefault(_HISTORY_KEY, deque(maxlen=RENDER_HISTORY))
+    rerun = history[-1][0].rerun + 1 if history else 1
+    st.session_state[_CURRENT_KEY] = {"rerun": rerun, "open": None, "timings": [], "token": token}
+
+
+def section(name: str):
+    """End the running section (if any) and start timing the next; a no-op unless this rerun is profiled.
+
+    Sections are sequential checkpoints rather than nested blocks, so marking costs one call per section.
+    """
+    current = st.session_state.get(_CURRENT_KEY)
+    if current is None:
+        return
+    if current["open"] is not None:
+        _close_section(current)
+    with _tracing_lock:
+        if tracemalloc.is_tracing():
+            # The peak is shared by the process: only reset it when no other profiled rerun is measuring it
+            if set(_tracing_runs) == {current["token"]}:
+                tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+        else:
+            start_bytes = 0
+    current["open"] = (name, time.perf_counter(), start_bytes)
+
+
+def finish_rerun():
+    """Close the last section and add this rerun to the session history."""
+    current = st.session_state.pop(_CURRENT_KEY, None)
+    if current is None:
+        return
+    if current["open"] is not None:
+        _close_section(current)
+    _update_tracing(remove=current["token"])
+    if current["timings"]:
+        st.session_state.setdefault(_HISTORY_KEY, deque(maxlen=RENDER_HISTORY)).append(current["timings"])
+
+
+def history_frame() -> pd.DataFrame:
+    """One row per section per profiled rerun, oldest first."""
+    history = st.session_state.get(_HISTORY_KEY, ())
+    return pd.DataFrame([t for timings in history for t in timings], columns=SectionTiming._fields)
+
+
+def breakdown(history: pd.DataFrame) -> pd.DataFrame:
+    """Per-section latest, mean, p95 and max time plus memory, in the order of the latest rerun."""
+    if history.empty:
+        return pd.DataFrame()
+    latest = history[history["rerun"] == history["rerun"].max()].set_index("section")
+    ms = history.assign(elapsed_ms=history["elapsed_s"] * 1000).groupby("section")["elapsed_ms"]
+    table = pd.DataFrame({
+        "latest ms": latest["elapsed_s"] * 1000,
+        "share %": latest["elapsed_s"] / latest["elapsed_s"].sum() * 100,
+        "mean ms": ms.mean(),
+        "p95 ms": ms.quantile(0.95),
+        "max ms": ms.max(),
+        "latest Δ MB (process)": latest["memory_delta_mb"],
+        "max peak MB (process)": history.groupby("section")["peak_mb"].max(),
+        "reruns": ms.size(),
+    })
+    # Sections missing from the latest rerun (another page, no data) go last
+    order = list(latest.index) + [s for s in table.index if s not in latest.index]
+    return table.loc[order]
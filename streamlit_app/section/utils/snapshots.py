@@ -0,0 +1,148 @@
+import threading
+import weakref
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Versions share column buffers through pandas Copy-on-Write (always on from pandas 3, see requirements.txt):
+# a shallow copy costs nothing until a column is written, and then only that column is copied.
+
+SESSION_MEMORY_BUDGET_MB = 2048
+# Labels that must survive eviction: the working frame and the reference the editor diffs against
+PINNED_LABELS = ("current", "original")
+
+_SESSION_KEY = "snapshot_store"
+
+
+class SnapshotBudgetExceeded(MemoryError):
+    pass
+
+
+class SnapshotUsage(NamedTuple):
+    owner: str
+    versions: int
+    # What the versions would take as independent copies, versus the distinct buffers actually held
+    logical_mb: float
+    resident_mb: float
+
+
+def _address(array: np.ndarray) -> int:
+    return array.__array_interface__["data"][0]
+
+
+def _column_buffers(series: pd.Series, object_bytes: dict):
+    """(buffer id, nbytes) pairs for the memory behind a column, so a buffer shared by versions counts once.
+
+    Deep sizes of object columns are memoized in object_bytes, since measuring them walks every value.
+    """
+    values = series.array
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.codes
+        return [(_address(codes), codes.nbytes),
+                (id(values.categories), int(values.categories.memory_usage(deep=True)))]
+    if hasattr(values, "_pa_array"):
+        # Arrow-backed columns (pandas' default string storage when pyarrow is installed)
+        return [(buffer.address, buffer.size) for chunk in values._pa_array.chunks
+                for buffer in chunk.buffers() if buffer is not None]
+    if hasattr(values, "_data") and hasattr(values, "_mask"):
+        # Nullable integer/boolean/float arrays
+        return [(_address(values._data), values._data.nbytes), (_address(values._mask), values._mask.nbytes)]
+    array = np.asarray(values)
+    if array.dtype == object:
+        key = (_address(array), len(array))
+        if key not in object_bytes:
+            object_bytes[key] = int(series.memory_usage(deep=True, index=False))
+        return [(key[0], object_bytes[key])]
+    return [(_address(array), array.nbytes)]
+
+
+class SnapshotStore:
+    """A session's DataFrames: the uploaded base plus named, immutable versions that share unchanged columns.
+
+    put() keeps a shallow snapshot, so later writes to the caller's frame never reach the stored version, and
+    checkout() hands out a shallow copy the caller may modify freely. Neither copies any column data.
+    """
+
+    def __init__(self, owner: str = "", budget_mb: float = SESSION_MEMORY_BUDGET_MB):
+        self.owner = owner
+        self.budget_mb = budget_mb
+        self._versions = {}
+        self._object_bytes = {}
+        self._lock = threading.Lock()
+
+    def reset(self, base: pd.DataFrame):
+        """Start over from a new upload."""
+        with self._lock:
+            self._versions = {"base": base.copy(deep=False)}
+            self._object_bytes = {}
+
+    def put(self, label: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Store df under label and return the stored snapshot.
+
+        Raises SnapshotBudgetExceeded (leaving the store unchanged) if, after evicting unpinned versions,
+        the session would still hold more than budget_mb.
+        """
+        snapshot = df.copy(deep=False)
+        with self._lock:
+            versions = dict(self._versions)
+            versions[label] = snapshot
+            resident = self._usage(versions).resident_mb
+            for evictable in [name for name in versions if name not in PINNED_LABELS and name != label]:
+                if resident <= self.budget_mb:
+                    break
+                del versions[evictable]
+                resident = self._usage(versions).resident_mb
+            if resident > self.budget_mb:
+                raise SnapshotBudgetExceeded(
+                    f"This change needs {resident:,.1f} MB for the session's data, over the {self.budget_mb:,.0f} MB limit."
+                )
+            self._versions = versions
+        return snapshot
+
+    def get(self, label: str):
+        """The stored version (treat it as read-only), or None."""
+        return self._versions.get(label)
+
+    def checkout(self, label: str) -> pd.DataFrame:
+        """A copy of the version that can be modified without touching the store."""
+        return self._versions[label].copy(deep=False)
+
+    def drop(self, label: str):
+        with self._lock:
+            self._versions.pop(label, None)
+
+    def labels(self):
+        return list(self._versions)
+
+    def _usage(self, versions) -> SnapshotUsage:
+        logical = 0
+        resident = {}
+        for frame in versions.values():
+            for i in range(frame.shape[1]):
+                for buffer_id, nbytes in _column_buffers(frame.iloc[:, i], self._object_bytes):
+                    logical += nbytes
+                    resident[buffer_id] = nbytes
+        return SnapshotUsage(self.owner, len(versions), logical / 1024**2, sum(resident.values()) / 1024**2)
+
+    def usage(self) -> SnapshotUsage:
+        return self._usage(dict(self._versions))
+
+
+# Every live store, so the diagnostics page can report memory per session
+_stores = weakref.WeakSet()
+
+
+def session_store() -> SnapshotStore:
+    """The snapshot store of the current Streamlit session, created on first use."""
+    store = st.session_state.get(_SESSION_KEY)
+    if store is None:
+        store = SnapshotStore(owner=st.session_state.get("username", ""))
+        st.session_state[_SESSION_KEY] = store
+        _stores.add(store)
+    return store
+
+
+def all_usage():
+    """Usage of every live session store."""
+    return [store.usage() for store in list(_stores)]
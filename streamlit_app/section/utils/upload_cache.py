@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+from typing import NamedTuple, Optional
+from section.utils import ingest
+from section.utils.optimize import OptimizationResult, optimize_cached, remember_optimization
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; without it every upload is parsed
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Parsed, dtype-optimized uploads are kept here as uncompressed Arrow IPC files, one per file content.
+# They hold the uploaded data, so the directory must belong to this user and be closed to everyone else;
+# otherwise (e.g. another user created it first in the shared temp dir) uploads are not cached.
+UPLOAD_CACHE_DIR = os.path.join(tempfile.gettempdir(), "banking_dashboard_upload_cache")
+UPLOAD_CACHE_MAX_MB = 2048
+# Bump when parsing or optimization changes, so entries written by older code are not reused
+UPLOAD_CACHE_FORMAT = 2
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+_METADATA_KEY = b"upload_cache"
+_SUFFIX = ".arrow"
+_evict_lock = threading.Lock()
+
+
+class CachedUpload(NamedTuple):
+    # Content hash of the file, also the fingerprint its optimization is cached under
+    key: str
+    optimization: OptimizationResult
+    from_cache: bool
+
+
+def upload_key(uploaded_file, columns=None, sheets=None) -> str:
+    """Hash of the file's bytes, extension and column and sheet selection (which decide how it is parsed).
+
+    The file position is left unchanged.
+    """
+    file_ext, compression = ingest.split_extension(uploaded_file.name)
+    digest = hashlib.sha1(f"{UPLOAD_CACHE_FORMAT}:{file_ext}:{compression}:{columns}:{sheets}:".encode())
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    while block := uploaded_file.read(HASH_BLOCK_BYTES):
+        digest.update(block)
+    uploaded_file.seek(position)
+    return digest.hexdigest()
+
+
+def _private_dir(cache_dir: str) -> bool:
+    """Create cache_dir if needed and check that only the current user can reach it."""
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # lstat: a symlink planted in place of the directory is rejected rather than followed
+        info = os.lstat(cache_dir)
+    except OSError as e:
+        logger.warning(f"Upload cache disabled, cannot create {cache_dir}: {e}")
+        return False
+    getuid = getattr(os, "getuid", None)  # not on Windows, where the temp dir is already per user
+    if not stat.S_ISDIR(info.st_mode) or (getuid is not None and info.st_uid != getuid()) or info.st_mode & 0o077:
+        logger.warning(f"Upload cache disabled, {cache_dir} is not a directory private to this user")
+        return False
+    return True
+
+
+def _path(key: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, key + _SUFFIX)
+
+
+def _read(key: str, cache_dir: str) -> Optional[OptimizationResult]:
+    """The cached result for key, memory-mapped, or None if there is no usable entry.
+
+    Columns without nulls are views of the mapped file and read-only: write to them through shallow copies,
+    as the session snapshot store does, so that Copy-on-Write copies a column before changing it.
+    """
+    path = _path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        stats = json.loads(table.schema.metadata[_METADATA_KEY])
+        frame = table.to_pandas(split_blocks=True)
+        # Reading counts as use for LRU eviction
+        os.utime(path)
+    except (OSError, pa.ArrowException, KeyError, ValueError) as e:
+        logger.warning(f"Discarding unreadable upload cache entry {path}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return OptimizationResult(frame, stats["original_mb"], stats["optimized_mb"])
+
+
+def _write(key: str, result: OptimizationResult, cache_dir: str, max_mb: float):
+    try:
+        table = pa.Table.from_pandas(result.frame, preserve_index=None)
+    except (pa.ArrowException, TypeError) as e:
+        # e.g. object columns mixing numbers and text; such uploads are simply parsed every time
+        logger.info(f"Upload not cached, Arrow cannot store it: {e}")
+        return
+    stats = {"original_mb": result.original_mb, "optimized_mb": result.optimized_mb}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _METADATA_KEY: json.dumps(stats).encode()})
+
+    # Written under a temporary name and renamed, so other sessions never map a half-written file
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, _path(key, cache_dir))
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Could not write upload cache entry: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+    evict(cache_dir, max_mb)
+
+
+def evict(cache_dir: str = UPLOAD_CACHE_DIR, max_mb: float = UPLOAD_CACHE_MAX_MB):
+    """Remove the least recently used entries until the cache fits in max_mb."""
+    with _evict_lock:
+        try:
+            names = [name for name in os.listdir(cache_dir) if name.endswith(_SUFFIX)]
+        except FileNotFoundError:
+            return
+        entries = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                continue  # evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= max_mb * 1024**2:
+                break
+            try:
+                # Sessions that already mapped the file keep their data; the name is freed
+                os.remove(os.path.join(cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+
+def load_upload(uploaded_file, memory_budget_mb: float = ingest.INGEST_MEMORY_BUDGET_MB, progress_callback=None,
+                cache_dir: str = UPLOAD_CACHE_DIR, max_mb: float = UPLOAD_CACHE_MAX_MB, columns=None, sheets=None):
+    """Parse and optimize an upload, or reload the result from the on-disk cache if this content was seen before.
+
+    columns and sheets are passed on to ingest.load_file; each selection is cached separately.
+    Returns (CachedUpload, None) on success or (None, error message) on failure, like ingest.load_file.
+    """
+    key = upload_key(uploaded_file, columns, sheets)
+    use_cache = pa is not None and _private_dir(cache_dir)
+    if use_cache:
+        cached = _read(key, cache_dir)
+        if cached is not None:
+            remember_optimization(key, cached)
+            if progress_callback:
+                progress_callback(1.0, f"Loaded {len(cached.frame):,} rows from cache")
+            return CachedUpload(key, cached, True), None
+
+    data, error = ingest.load_file(uploaded_file, memory_budget_mb=memory_budget_mb, progress_callback=progress_callback,
+                                  columns=columns, sheets=sheets)
+    if error:
+        return None, error
+    result = optimize_cached(data, fingerprint=key)
+    if use_cache:
+        _write(key, result, cache_dir, max_mb)
+    return CachedUpload(key, result, False), None
@@ -0,0 +1,214 @@
+import re
+import time
+from typing import List, NamedTuple
+import numpy as np
+import pandas as pd
+from section.utils.patterns import CARD_PATTERN, iban_valid, luhn_valid
+
+# ISO 4217 codes of currencies in circulation
+CURRENCY_WHITELIST = frozenset("""
+    AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP BYN BZD CAD CDF
+    CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD GNF GTQ GYD HKD
+    HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD KZT LAK LBP LKR LRD LSL LYD
+    MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR NZD OMR PAB PEN PGK PHP PKR PLN
+    PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SOS SRD SSP STN SVC SYP SZL THB TJS TMT TND TOP TRY
+    TTD TWD TZS UAH UGX USD UYU UZS VES VND VUV WST XAF XCD XOF XPF YER ZAR ZMW ZWG
+""".split())
+# Dates outside [DATE_MIN, today + DATE_MAX_AHEAD_DAYS] are reported
+DATE_MIN = "1900-01-01"
+DATE_MAX_AHEAD_DAYS = 1
+# Rows with violations the dashboard shows under the summary
+VIOLATION_PREVIEW_ROWS = 200
+
+# Rules chosen from the names of critical columns. Names are compared word by word (split on underscores,
+# spaces and camelCase) and a name must end with the words of an entry: "posting_date" and "closingBalance"
+# match, "updated_by" and "currency_pair" do not. The first matching entry wins.
+NAME_RULES = (
+    ('transaction_id', 'unique'),
+    ('iban', 'iban'),
+    ('card_number', 'luhn'),
+    ('card_no', 'luhn'),
+    ('currency', 'currency'),
+    ('currency_code', 'currency'),
+    ('balance', 'non_negative'),
+    ('date', 'date_range'),
+    ('timestamp', 'date_range'),
+    ('dob', 'date_range'),
+    ('date_of_birth', 'date_range'),
+)
+# Rules for the value kinds patterns.detect_sensitive_columns reports
+KIND_RULES = {'card_number': 'luhn', 'iban': 'iban'}
+
+RULE_DESCRIPTIONS = {
+    'luhn': "card number of 13-19 digits passing the Luhn check",
+    'iban': "IBAN passing the ISO 13616 mod-97 check",
+    'currency': "ISO 4217 currency code",
+    'non_negative': "number that is zero or more",
+    'date_range': "date from 1900 up to tomorrow",
+    'unique': "value not repeated in another row",
+}
+
+
+class ValidationRule(NamedTuple):
+    column: str
+    # One of RULE_DESCRIPTIONS
+    check: str
+
+
+class ValidationReport(NamedTuple):
+    # One row per failing cell: row label, column and check (the last two categorical)
+    violations: pd.DataFrame
+    # One row per rule: column, check, non-null values checked and violations found
+    summary: pd.DataFrame
+    seconds: float
+
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+def _words(name) -> tuple:
+    """Lower-cased words of a column name: "cardNumber", "Card Number" and "card_number" give ('card', 'number')."""
+    return tuple(word.lower() for word in _WORD_RE.findall(str(name)))
+
+
+def _is_text(values: pd.Series) -> bool:
+    return (pd.api.types.is_string_dtype(values) or pd.api.types.is_object_dtype(values)
+            or isinstance(values.dtype, pd.CategoricalDtype))
+
+
+def _fits_dtype(values: pd.Series, check: str) -> bool:
+    """Whether a name-selected check makes sense for the column's dtype (dates are not numbers and vice versa)."""
+    if check == 'non_negative':
+        return _is_plain_numeric(values) or _is_text(values)
+    if check == 'date_range':
+        return pd.api.types.is_datetime64_any_dtype(values) or _is_text(values)
+    return True
+
+
+def infer_rules(df: pd.DataFrame, reasons: dict) -> List[ValidationRule]:
+    """Rules for the critical columns of df.
+
+    reasons is the classification from helper.identify_sensitive_columns (column -> 'keyword' or the
+    detected value kind): value kinds select their rule, and column names select rules through NAME_RULES
+    when the column's dtype suits the check.
+    """
+    rules = []
+    for col, reason in reasons.items():
+        if col not in df.columns:
+            continue
+        checks = [KIND_RULES[reason]] if reason in KIND_RULES else []
+        words = _words(col)
+        named = [check for fragment, check in NAME_RULES if words[-len(_words(fragment)):] == _words(fragment)][:1]
+        checks += [check for check in named if _fits_dtype(df[col], check)]
+        rules += [ValidationRule(col, check) for check in dict.fromkeys(checks)]
+    return rules
+
+
+def _text(values: pd.Series) -> pd.Series:
+    """Non-null values as stripped strings without spaces or dashes."""
+    return values.astype(str).str.replace(r"[\s-]", "", regex=True)
+
+
+def _failing_luhn(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_float_dtype(values):
+        # Card numbers read as floats (because of nulls) are written without the ".0"
+        numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+        whole = numbers % 1 == 0
+        text = values.astype(str).to_numpy(dtype=object)
+        text[whole] = np.char.mod('%.0f', numbers[whole])
+        values = pd.Series(text, index=values.index)
+    compact = _text(values)
+    well_formed = compact.str.fullmatch(CARD_PATTERN).to_numpy(dtype=bool)
+    return ~(well_formed & luhn_valid(compact))
+
+
+def _failing_iban(values: pd.Series) -> np.ndarray:
+    return ~iban_valid(values)
+
+
+def _failing_currency(values: pd.Series) -> np.ndarray:
+    return ~values.astype(str).str.strip().str.upper().isin(CURRENCY_WHITELIST).to_numpy()
+
+
+def _is_plain_numeric(values: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+
+
+def _failing_non_negative(values: pd.Series) -> np.ndarray:
+    numbers = values if _is_plain_numeric(values) else pd.to_numeric(values, errors='coerce')
+    numbers = numbers.to_numpy(dtype='float64', na_value=np.nan)
+    # Text that is not a number fails too
+    return np.isnan(numbers) | (numbers < 0)
+
+
+def _failing_date_range(values: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        # Each value is parsed on its own, so one column may mix formats (e.g. ISO and day-first text)
+        values = pd.to_datetime(values.astype(str), errors='coerce', format='mixed')
+    if values.dt.tz is not None:
+        values = values.dt.tz_convert(None)
+    latest = pd.Timestamp.now().normalize() + pd.Timedelta(days=DATE_MAX_AHEAD_DAYS + 1)
+    inside = (values >= pd.Timestamp(DATE_MIN)) & (values < latest)
+    # Unparseable text is NaT, which is never inside the range
+    return ~inside.to_numpy(dtype=bool)
+
+
+_CHECKS = {
+    'luhn': _failing_luhn,
+    'iban': _failing_iban,
+    'currency': _failing_currency,
+    'non_negative': _failing_non_negative,
+    'date_range': _failing_date_range,
+}
+
+
+def failing(series: pd.Series, check: str) -> np.ndarray:
+    """Boolean mask of the values of series that fail check; nulls never fail.
+
+    Value checks on text and categorical columns run once per distinct value rather than once per row:
+    card numbers, currencies and dates repeat across a customer's transactions.
+    """
+    present = series.notna().to_numpy()
+    if check == 'unique':
+        return present & series.duplicated(keep=False).to_numpy()
+    if not present.any():
+        return np.zeros(len(series), dtype=bool)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    elif _is_plain_numeric(series) or pd.api.types.is_datetime64_any_dtype(series):
+        mask = np.zeros(len(series), dtype=bool)
+        mask[present] = _CHECKS[check](series[present].reset_index(drop=True))
+        return mask
+    else:
+        # Nulls get code -1
+        codes, values = pd.factorize(series)
+    if len(values) == 0:
+        return np.zeros(len(series), dtype=bool)
+    fails_by_value = _CHECKS[check](pd.Series(values))
+    return present & fails_by_value[np.where(codes >= 0, codes, 0)]
+
+
+def validate(df: pd.DataFrame, rules: List[ValidationRule]) -> ValidationReport:
+    """Run every rule over its whole column and collect the failing cells."""
+    started = time.perf_counter()
+    positions, summary = [], []
+    for rule in rules:
+        if rule.column not in df.columns or rule.check not in RULE_DESCRIPTIONS:
+            continue
+        series = df[rule.column]
+        mask = failing(series, rule.check)
+        positions.append(np.flatnonzero(mask))
+        summary.append({'column': rule.column, 'check': rule.check, 'checked': int(series.notna().sum()),
+                        'violations': int(mask.sum())})
+
+    # Each violation stores the number of its rule, expanded into categorical column and check codes
+    rule_of = np.repeat(np.arange(len(summary)), [len(p) for p in positions]).astype(np.int64)
+    column_codes, columns = pd.factorize(pd.Index([s['column'] for s in summary], dtype=object))
+    check_codes = np.array([list(RULE_DESCRIPTIONS).index(s['check']) for s in summary], dtype=np.int64)
+    violations = pd.DataFrame({
+        'row': df.index.take(np.concatenate(positions) if positions else np.array([], dtype=np.int64)),
+        'column': pd.Categorical.from_codes(column_codes[rule_of], categories=columns),
+        'check': pd.Categorical.from_codes(check_codes[rule_of], categories=list(RULE_DESCRIPTIONS)),
+    })
+    return ValidationReport(violations, pd.DataFrame(summary, columns=['column', 'check', 'checked', 'violations']),
+                            time.perf_counter() - started)
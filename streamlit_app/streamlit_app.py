@@ -1,9 +1,8 @@
 import streamlit as st
 import hashlib
 import time 
-from section import dashboardver2_1
 from datetime import datetime
-from section.utils.helper import insert_user, insert_admin, get_admin_by_username, get_user_by_username
+from section.utils.helper import insert_user, insert_admin, get_login_credentials
 
 st.set_page_config(page_title='Dashboard', layout='wide')
 
@@ -43,21 +42,18 @@ def login(username, password):
     
     hashed_pw = hash_password(password)
 
-    user = get_user_by_username(username)
-    if user and user.get('password') == hashed_pw:
-        st.session_state.user_role = "user" 
-        return True, f"Welcome, {username} (User)!"
-
-    admin = get_admin_by_username(username)
-    if admin and admin.get('password') == hashed_pw:
-        st.session_state.user_role = "admin"  
-        return True, f"Welcome, {username} (Admin)!"
+    for role, stored_pw in get_login_credentials(username):
+        if stored_pw == hashed_pw:
+            st.session_state.user_role = role
+            return True, f"Welcome, {username} ({role.capitalize()})!"
 
     return False, "Invalid username or password."
 
 
 def main():
     if 'login_success' in st.session_state and st.session_state.login_success:
+        # The dashboard (pandas, plotly, page modules) is only imported after login
+        from section import dashboardver2_1
         dashboardver2_1.show_dashboard()
         return
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app's modules the way streamlit_app.py does, from the streamlit_app directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
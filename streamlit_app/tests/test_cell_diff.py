@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+from section.utils.helper import compute_cell_diff
+
+
+@pytest.mark.parametrize("original, current", [
+    (pd.array([1, None, 3, None], dtype="Int64"), pd.array([1, None, 4, 5], dtype="Int64")),
+    (pd.array([True, None, False, None], dtype="boolean"), pd.array([True, None, True, False], dtype="boolean")),
+    (pd.array([1.5, None, 2.0, None], dtype="Float64"), pd.array([1.5, None, 2.5, 0.0], dtype="Float64")),
+    (pd.Series(["a", None, "c", None], dtype="str"), pd.Series(["a", None, "d", "e"], dtype="str")),
+])
+def test_nullable_columns_with_nulls(original, current):
+    diff = compute_cell_diff(pd.DataFrame({"col": current}), pd.DataFrame({"col": original}), [])
+    np.testing.assert_array_equal(diff.edited[:, 0], [False, False, True, True])
+    np.testing.assert_array_equal(diff.null[:, 0], [False, True, False, False])
+
+
+def test_value_removed_counts_as_edit():
+    original = pd.DataFrame({"col": pd.array([1, 2], dtype="Int64")})
+    current = pd.DataFrame({"col": pd.array([1, None], dtype="Int64")})
+    np.testing.assert_array_equal(compute_cell_diff(current, original, []).edited[:, 0], [False, True])
@@ -0,0 +1,32 @@
+import io
+import pandas as pd
+import pyarrow as pa
+import pytest
+from section.utils import ingest
+
+
+def _upload(data: bytes, name: str):
+    upload = io.BytesIO(data)
+    upload.name, upload.size = name, len(data)
+    return upload
+
+
+@pytest.mark.parametrize("block_bytes", [64, ingest.ARROW_BLOCK_BYTES])
+def test_csv_column_turning_to_text_in_a_later_chunk(monkeypatch, block_bytes):
+    # Small Arrow blocks make Arrow reject the later text and fall back to pandas' chunked reader
+    monkeypatch.setattr(ingest, "ARROW_BLOCK_BYTES", block_bytes)
+    data = b"id,code\n" + b"".join(b"%d,%d\n" % (i, i) for i in range(300)) + b"300,A0\n301,A1\n"
+    df, error = ingest.load_file(_upload(data, "mixed.csv"), chunk_rows=100)
+    assert error is None
+    assert pd.api.types.is_integer_dtype(df["id"])
+    assert pd.api.types.is_string_dtype(df["code"])
+    assert df["code"].iloc[[0, 299, 301]].tolist() == ["0", "299", "A1"]
+    pa.Table.from_pandas(df)
+
+
+def test_json_column_turning_to_text_in_a_later_chunk():
+    data = b"".join(b'{"amount": %d}\n' % i for i in range(10)) + b'{"amount": "n/a"}\n'
+    df, error = ingest.load_file(_upload(data, "mixed.json"), chunk_rows=5)
+    assert error is None
+    assert df["amount"].map(type).eq(str).all()
+    pa.Table.from_pandas(df)
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from section.utils import helper
+
+OWNER = ("session", "upload")
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    monkeypatch.setattr(helper, "_engines", {})
+    monkeypatch.setattr(helper, "_persisted_tables", {})
+    helper.set_engine("database1", engine)
+    return engine
+
+
+def _frame(n):
+    return pd.DataFrame({"id": range(n), "amount": [float(i) for i in range(n)]})
+
+
+def _rows(engine, table):
+    return pd.read_sql(f"SELECT * FROM {table} ORDER BY id", engine)
+
+
+def test_first_save_creates_missing_table(engine):
+    ok, message = helper.save_dataframe_to_db(_frame(10), "New Table", owner=OWNER)
+    assert ok, message
+    assert len(_rows(engine, "new_table")) == 10
+
+
+def test_dropped_table_is_rewritten(engine):
+    helper.save_dataframe_to_db(_frame(10), "accounts", owner=OWNER)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE accounts"))
+    edited = pd.concat([_frame(10), pd.DataFrame({"id": [10], "amount": [1.0]})], ignore_index=True)
+    ok, message = helper.save_dataframe_to_db(edited, "accounts", owner=OWNER)
+    assert ok, message
+    assert len(_rows(engine, "accounts")) == 11
+
+
+def test_delta_falls_back_when_table_changed_elsewhere(engine):
+    helper.save_dataframe_to_db(_frame(10), "accounts", owner=OWNER)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM accounts WHERE id = 3"))
+    edited = _frame(10)
+    edited.loc[3, "amount"] = 99.0
+    ok, message = helper.save_dataframe_to_db(edited, "accounts", owner=OWNER)
+    assert ok and "successfully" in message
+    pd.testing.assert_frame_equal(_rows(engine, "accounts"), edited)
+
+
+def test_delta_save(engine):
+    helper.save_dataframe_to_db(_frame(10), "accounts", owner=OWNER)
+    edited = _frame(10)
+    edited.loc[3, "amount"] = 99.0
+    ok, message = helper.save_dataframe_to_db(edited, "accounts", owner=OWNER)
+    assert ok and "1 updated" in message
+    pd.testing.assert_frame_equal(_rows(engine, "accounts"), edited)